@@ -2,27 +2,102 @@
 
 from __future__ import annotations
 
-import shutil
+import contextlib
+import mmap
+import os
+import pickle
 import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Literal, overload
+from typing import Literal, Self, overload
 
+import numpy as np
 from langchain_core.embeddings import Embeddings
 
-from athenaeum.chunker import TextSplitter, auto_chunk_splitter, chunk_markdown, make_splitter
+from athenaeum.chunker import (
+    TextSplitter,
+    auto_chunk_splitter,
+    chunk_markdown_structured,
+    make_splitter,
+)
 from athenaeum.config import AthenaeumConfig
 from athenaeum.document_store import DocumentStore
 from athenaeum.models import ChunkMetadata, ContentSearchHit, DocSummary, Document, Excerpt, SearchHit
 from athenaeum.ocr import OCRProvider, get_ocr_provider
 from athenaeum.search.bm25 import BM25Index
-from athenaeum.search.hybrid import reciprocal_rank_fusion
+from athenaeum.search.hybrid import reciprocal_rank_fusion, top_k_indices
 from athenaeum.search.vector import VectorIndex
 from athenaeum.storage import StorageManager
 from athenaeum.toc import extract_toc
 
+# Below this many documents, worker start-up costs more than chunking serially.
+_PARALLEL_REINDEX_MIN_DOCS = 8
+
+
+def _default_splitter(
+    markdown: str, text_splitter: TextSplitter | None, auto_chunk: bool
+) -> TextSplitter:
+    """Splitter used when no per-call chunk params are given (see ``_resolve_splitter``)."""
+    if text_splitter is not None:
+        return text_splitter
+    if auto_chunk:
+        return auto_chunk_splitter(markdown)
+    return make_splitter()
+
+
+def _chunk_stored_doc(
+    job: tuple[str, str, TextSplitter | None, bool],
+) -> tuple[list[ChunkMetadata], list[list[str]]]:
+    """Read, chunk and BM25-tokenise one stored document.
+
+    Module-level so it can be shipped to worker processes by ``_reindex_bm25``.
+    """
+    doc_id, path_to_md, text_splitter, auto_chunk = job
+    md_path = Path(path_to_md)
+    if not md_path.exists():
+        return [], []
+    text = md_path.read_text(encoding="utf-8")
+    splitter = _default_splitter(text, text_splitter, auto_chunk)
+    chunks = chunk_markdown_structured(text, doc_id, extract_toc(text), text_splitter=splitter)
+    return chunks, BM25Index.tokenize_chunks(chunks)
+
+
+def _read_line_range(md_path: Path, start_idx: int, end_idx: int) -> str:
+    """Return lines ``[start_idx, end_idx)`` (0-indexed) of *md_path* joined by ``\n``.
+
+    The file is memory-mapped and only scanned up to the end of the requested
+    range, so reading the head of a large document doesn't load all of it.
+    """
+    if end_idx <= start_idx:
+        return ""
+    with md_path.open("rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start_off = 0
+            for _ in range(start_idx):
+                nl = mm.find(b"\n", start_off)
+                if nl == -1:
+                    return ""
+                start_off = nl + 1
+            end_off = pos = start_off
+            for _ in range(end_idx - start_idx):
+                nl = mm.find(b"\n", pos)
+                if nl == -1:
+                    end_off = len(mm)
+                    break
+                end_off, pos = nl, nl + 1
+            data = mm[start_off:end_off]
+    return data.decode("utf-8").replace("\r\n", "\n")
+
 
 class Athenaeum:
-    """Main entry point for the Athenaeum knowledge base."""
+    """Main entry point for the Athenaeum knowledge base.
+
+    Holds a small thread pool for background work; call :meth:`close` (or use
+    the instance as a context manager) when done with it.
+    """
 
     def __init__(
         self,
@@ -36,13 +111,31 @@ class Athenaeum:
         self._storage = StorageManager(self._config.storage_dir)
         self._doc_store = DocumentStore(self._storage)
         self._ocr = ocr_provider or get_ocr_provider("markitdown")
-        self._bm25 = BM25Index()
+        self._supported_ext = frozenset(self._ocr.supported_extensions())
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="athenaeum")
         self._vector = VectorIndex(
             embeddings=embeddings,
             persist_directory=self._storage.ensure_chroma_dir(),
             collection_name="athenaeum",
+            batch_size=self._config.embed_batch_size,
+            max_concurrency=self._config.embed_max_concurrency,
         )
-        self._reindex_bm25()
+        self._bm25 = self._load_bm25()
+
+    def close(self) -> None:
+        """Shut down the background worker threads. Safe to call more than once.
+
+        Also persists up-to-date BM25 score matrices, so the next instance can
+        memory-map them instead of rebuilding the index on its first search.
+        """
+        self._executor.shutdown(wait=True)
+        self._bm25.build()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
     # ------------------------------------------------------------------
     # Internal helpers
@@ -68,21 +161,79 @@ class Athenaeum:
             cs = chunk_size if chunk_size is not None else 1500
             co = chunk_overlap if chunk_overlap is not None else 200
             return make_splitter(chunk_size=cs, chunk_overlap=co, separators=separators)
-        if self._text_splitter is not None:
-            return self._text_splitter
-        if self._config.auto_chunk:
-            return auto_chunk_splitter(markdown)
-        return make_splitter()
-
-    def _reindex_bm25(self) -> None:
-        """Rebuild BM25 index from all stored documents."""
-        for doc in self._doc_store.list_all():
-            md_path = Path(doc.path_to_md)
-            if md_path.exists():
-                text = md_path.read_text()
-                splitter = self._resolve_splitter(text)
-                chunks = chunk_markdown(text, doc.id, text_splitter=splitter)
-                self._bm25.add_chunks(chunks)
+        return _default_splitter(markdown, self._text_splitter, self._config.auto_chunk)
+
+    def _load_bm25(self) -> BM25Index:
+        """Load the persisted BM25 index, bringing it up to date with the registry.
+
+        Chunks of documents that are still registered are reused as persisted, so
+        only documents missing from the index are read and chunked again. The
+        index is only written back if that changed it.
+        """
+        bm25_dir = self._storage.bm25_dir
+        self._bm25 = BM25Index()
+        if bm25_dir.exists():
+            with contextlib.suppress(OSError, ValueError):
+                self._bm25 = BM25Index.load(bm25_dir, mmap=True)
+
+        # Only documents that need reindexing are loaded from the registry
+        registered = self._doc_store.list_ids()
+        indexed = self._bm25.doc_ids
+        stale = indexed.difference(registered)
+        missing = [self._doc_store.get(doc_id) for doc_id in registered if doc_id not in indexed]
+
+        if stale:
+            self._bm25.remove_documents(stale)
+        if missing:
+            self._reindex_bm25([doc for doc in missing if doc is not None])
+        if stale or missing or not bm25_dir.exists():
+            self._bm25.save(bm25_dir)
+        return self._bm25
+
+    def _reindex_bm25(self, docs: list[Document] | None = None) -> None:
+        """Chunk stored documents and add them to the BM25 index.
+
+        Chunking and tokenising are CPU-bound and independent per document, so
+        large batches are processed in a process pool.
+
+        Args:
+            docs: Documents to index. Defaults to every registered document.
+        """
+        if docs is None:
+            docs = self._doc_store.list_all()
+        if not docs:
+            return
+        jobs = [
+            (doc.id, doc.path_to_md, self._text_splitter, self._config.auto_chunk)
+            for doc in docs
+        ]
+        results: list[tuple[list[ChunkMetadata], list[list[str]]]] | None = None
+        if len(jobs) >= _PARALLEL_REINDEX_MIN_DOCS and self._splitter_is_picklable():
+            try:
+                workers = min(len(jobs), os.cpu_count() or 1)
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_chunk_stored_doc, jobs))
+            except (BrokenProcessPool, OSError):
+                # Workers died, or the pool could not be created at all (e.g. no
+                # permission for semaphores in a sandbox); index in-process instead.
+                results = None
+        if results is None:
+            results = [_chunk_stored_doc(job) for job in jobs]
+
+        # Index once so corpus statistics are computed over the whole union.
+        self._bm25.add_chunks(
+            [chunk for chunks, _ in results for chunk in chunks],
+            token_lists=[tokens for _, token_lists in results for tokens in token_lists],
+            doc_ids=[doc.id for doc in docs],
+        )
+
+    def _splitter_is_picklable(self) -> bool:
+        """Whether the instance splitter can be sent to worker processes."""
+        try:
+            pickle.dumps(self._text_splitter)
+        except Exception:
+            return False
+        return True
 
     def load_doc(
         self,
@@ -113,52 +264,76 @@ class Athenaeum:
             raise FileNotFoundError(f"File not found: {file_path}")
 
         ext = file_path.suffix.lower()
-        supported = self._ocr.supported_extensions()
-        if ".*" not in supported and ext not in supported:
+        if ".*" not in self._supported_ext and ext not in self._supported_ext:
             raise ValueError(
-                f"Unsupported file type: {ext}. Supported: {sorted(supported)}"
+                f"Unsupported file type: {ext}. Supported: {sorted(self._supported_ext)}"
             )
 
         doc_id = uuid.uuid4().hex[:12]
+        embed_future: Future[None] | None = None
+        try:
+            # Copy raw file
+            raw_dest = self._storage.store_raw(doc_id, file_path, ext)
+
+            # Convert to markdown and chunk along its heading structure
+            markdown = self._ocr.convert(file_path)
+            toc = extract_toc(markdown)
+            splitter = self._resolve_splitter(
+                markdown,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                separators=separators,
+            )
+            chunks = chunk_markdown_structured(markdown, doc_id, toc, text_splitter=splitter)
+
+            # Embedding is network/GPU-bound: run it while the rest is persisted and indexed
+            embed_future = self._executor.submit(self._vector.add_chunks, chunks)
+
+            md_dest = self._storage.content_md_path(doc_id)
+            md_dest.write_text(markdown, encoding="utf-8")
+
+            doc = Document(
+                id=doc_id,
+                name=file_path.name,
+                path_to_raw=str(raw_dest),
+                path_to_md=str(md_dest),
+                num_lines=markdown.count("\n") + 1,
+                table_of_contents=toc,
+                file_size=file_path.stat().st_size,
+                file_type=ext,
+                tags=tags or set(),
+            )
+            self._doc_store.add(doc)
+
+            # Index
+            self._bm25.add_chunks(chunks, doc_ids=[doc_id])
+            self._bm25.save(self._storage.bm25_dir)
+            embed_future.result()
+        except Exception:
+            if embed_future is not None:
+                # Let the embedding land first so its vectors are removed too
+                wait([embed_future])
+            self._discard_partial_doc(doc_id)
+            raise
 
-        # Copy raw file
-        raw_dest = self._storage.raw_path(doc_id, ext)
-        shutil.copy2(file_path, raw_dest)
-
-        # Convert to markdown
-        markdown = self._ocr.convert(file_path)
-        md_dest = self._storage.content_md_path(doc_id)
-        md_dest.write_text(markdown)
-
-        # Extract metadata
-        toc = extract_toc(markdown)
-        lines = markdown.split("\n")
-
-        doc = Document(
-            id=doc_id,
-            name=file_path.name,
-            path_to_raw=str(raw_dest),
-            path_to_md=str(md_dest),
-            num_lines=len(lines),
-            table_of_contents=toc,
-            file_size=file_path.stat().st_size,
-            file_type=ext,
-            tags=tags or set(),
-        )
-        self._doc_store.add(doc)
+        return doc_id
 
-        # Index
-        splitter = self._resolve_splitter(
-            markdown,
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=separators,
-        )
-        chunks = chunk_markdown(markdown, doc_id, text_splitter=splitter)
-        self._bm25.add_chunks(chunks)
-        self._vector.add_chunks(chunks)
+    def _discard_partial_doc(self, doc_id: str) -> None:
+        """Undo whatever a failed ``load_doc`` managed to store for *doc_id*.
 
-        return doc_id
+        Each step is best-effort, so the error that aborted the load is the one
+        the caller sees.
+        """
+        with contextlib.suppress(Exception):
+            self._vector.remove_document(doc_id)
+        with contextlib.suppress(Exception):
+            if doc_id in self._bm25.doc_ids:
+                self._bm25.remove_document(doc_id)
+                self._bm25.save(self._storage.bm25_dir)
+        with contextlib.suppress(Exception):
+            self._doc_store.remove(doc_id)
+        with contextlib.suppress(Exception):
+            self._storage.remove_doc(doc_id)
 
     def tag_doc(self, doc_id: str, tags: set[str]) -> None:
         """Add tags to an existing document.
@@ -211,7 +386,7 @@ class Athenaeum:
         doc = self._doc_store.get(doc_id)
         if doc is None:
             raise ValueError(f"Document not found: {doc_id}")
-        return doc.format_toc()
+        return self._doc_store.formatted_toc(doc_id)
 
     def get_tags(self, doc_id: str) -> set[str]:
         """Return the tags for a document.
@@ -276,7 +451,7 @@ class Athenaeum:
         """
         doc_ids: set[str] | None = None
         if tags:
-            doc_ids = {d.id for d in self._doc_store.list_by_tags(tags)}
+            doc_ids = self._doc_store.ids_by_tags(tags)
             if not doc_ids:
                 return []
 
@@ -301,32 +476,47 @@ class Athenaeum:
 
         chunks = self._search_chunks(query, top_k=top_k * 3, strategy=strategy, doc_ids=doc_ids)
 
-        # Aggregate chunks by document
-        doc_scores: dict[str, float] = {}
-        doc_snippets: dict[str, str] = {}
-        for chunk, score in chunks:
-            if chunk.doc_id not in doc_scores or score > doc_scores[chunk.doc_id]:
-                doc_scores[chunk.doc_id] = score
-                doc_snippets[chunk.doc_id] = chunk.text[:200]
-
-        results_hit: list[SearchHit] = []
-        for doc_id, score in sorted(doc_scores.items(), key=lambda x: x[1], reverse=True):
-            doc = self._doc_store.get(doc_id)
+        # Aggregate chunks by document. Chunks arrive best-first, so a document's
+        # first chunk supplies its snippet. Chunks of documents missing from the
+        # store are dropped here, before the top-k cut, so they cannot use up slots.
+        doc_index: dict[str, int] = {}
+        docs: list[Document] = []
+        doc_snippets: list[str] = []
+        missing: set[str] = set()
+        for chunk, _ in chunks:
+            if chunk.doc_id in doc_index or chunk.doc_id in missing:
+                continue
+            doc = self._doc_store.get(chunk.doc_id)
             if doc is None:
+                missing.add(chunk.doc_id)
                 continue
+            doc_index[chunk.doc_id] = len(doc_index)
+            docs.append(doc)
+            doc_snippets.append(chunk.text[:200])
+        chunks = [(c, s) for c, s in chunks if c.doc_id in doc_index]
+        chunk_docs = np.fromiter(
+            (doc_index[c.doc_id] for c, _ in chunks), dtype=np.intp, count=len(chunks)
+        )
+        chunk_scores = np.fromiter((s for _, s in chunks), dtype=np.float64, count=len(chunks))
+        doc_scores = np.full(len(doc_index), -np.inf)
+        np.maximum.at(doc_scores, chunk_docs, chunk_scores)
+
+        results_hit: list[SearchHit] = []
+        for i in top_k_indices(doc_scores, top_k):
+            doc = docs[i]
             results_hit.append(
                 SearchHit(
                     id=doc.id,
                     name=doc.name,
                     num_lines=doc.num_lines,
-                    table_of_contents=doc.format_toc(),
+                    table_of_contents=self._doc_store.formatted_toc(doc.id),
                     tags=doc.tags,
-                    score=score,
-                    snippet=doc_snippets.get(doc_id, ""),
+                    score=float(doc_scores[i]),
+                    snippet=doc_snippets[i],
                 )
             )
 
-        return results_hit[:top_k]
+        return results_hit
 
     def search_doc(
         self,
@@ -383,46 +573,44 @@ class Athenaeum:
         if doc is None:
             raise ValueError(f"Document not found: {doc_id}")
 
-        md_path = Path(doc.path_to_md)
-        lines = md_path.read_text().split("\n")
-
+        total_lines = doc.num_lines
         start_idx = max(0, start_line - 1)
-        end_idx = min(len(lines), end_line)
-        selected = lines[start_idx:end_idx]
+        end_idx = min(total_lines, end_line)
 
         return Excerpt(
             doc_id=doc_id,
             line_range=(start_idx + 1, end_idx),
-            text="\n".join(selected),
-            total_lines=len(lines),
+            text=_read_line_range(Path(doc.path_to_md), start_idx, end_idx),
+            total_lines=total_lines,
         )
 
     def _search_by_name(
         self, query: str, top_k: int, doc_ids: set[str] | None = None
     ) -> list[SearchHit]:
         query_lower = query.lower()
-        scored = []
-        for doc in self._doc_store.list_all():
-            if doc_ids is not None and doc.id not in doc_ids:
+        ids, names_lower = self._doc_store.lowercase_names()
+        mask = np.char.find(names_lower, query_lower) >= 0
+        if doc_ids is not None:
+            mask &= np.fromiter((i in doc_ids for i in ids), dtype=bool, count=len(ids))
+        rows = np.flatnonzero(mask)
+        # Simple relevance: exact match > contains
+        scores = np.where(names_lower[rows] == query_lower, 1.0, 0.5)
+        results: list[SearchHit] = []
+        for r in top_k_indices(scores, top_k):
+            doc = self._doc_store.get(ids[rows[r]])
+            if doc is None:
                 continue
-            name_lower = doc.name.lower()
-            if query_lower in name_lower:
-                # Simple relevance: exact match > contains
-                score = 1.0 if query_lower == name_lower else 0.5
-                scored.append((doc, score))
-
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return [
-            SearchHit(
-                id=doc.id,
-                name=doc.name,
-                num_lines=doc.num_lines,
-                table_of_contents=doc.format_toc(),
-                tags=doc.tags,
-                score=score,
+            results.append(
+                SearchHit(
+                    id=doc.id,
+                    name=doc.name,
+                    num_lines=doc.num_lines,
+                    table_of_contents=self._doc_store.formatted_toc(doc.id),
+                    tags=doc.tags,
+                    score=float(scores[r]),
+                )
             )
-            for doc, score in scored[:top_k]
-        ]
+        return results
 
     def _search_chunks(
         self,
@@ -442,12 +630,15 @@ class Athenaeum:
                 similarity_threshold=self._config.similarity_threshold,
             )
 
-        # hybrid
-        bm25_results = self._bm25.search(query, top_k=top_k, doc_id=doc_id, doc_ids=doc_ids)
-        vector_results = self._vector.search(
+        # hybrid: the vector query (embedding + ANN) runs on the shared executor
+        # while BM25 scores in this thread.
+        vector_future = self._executor.submit(
+            self._vector.search,
             query, top_k=top_k, doc_id=doc_id, doc_ids=doc_ids,
             similarity_threshold=self._config.similarity_threshold,
         )
+        bm25_results = self._bm25.search(query, top_k=top_k, doc_id=doc_id, doc_ids=doc_ids)
+        vector_results = vector_future.result()
         return reciprocal_rank_fusion(
             [bm25_results, vector_results],
             k=self._config.rrf_k,
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Protocol, runtime_checkable
 
+import numpy as np
 from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
 
-from athenaeum.models import ChunkMetadata
+from athenaeum.models import ChunkMetadata, TOCEntry
 
 _DEFAULT_CHUNK_SIZE = 1500
 _DEFAULT_CHUNK_OVERLAP = 200
@@ -26,6 +28,9 @@ def make_splitter(
 ) -> TextSplitter:
     """Create a RecursiveCharacterTextSplitter for markdown.
 
+    Splitters are stateless, so instances are cached per parameter set and
+    shared between calls.
+
     Args:
         chunk_size: Maximum characters per chunk.
         chunk_overlap: Overlapping characters between consecutive chunks.
@@ -35,9 +40,17 @@ def make_splitter(
     Returns:
         A text splitter compatible with the ``TextSplitter`` protocol.
     """
+    key = tuple(separators) if separators is not None else None
+    return _cached_splitter(chunk_size, chunk_overlap, key)
+
+
+@lru_cache(maxsize=16)
+def _cached_splitter(
+    chunk_size: int, chunk_overlap: int, separators: tuple[str, ...] | None
+) -> TextSplitter:
     if separators is not None:
         return RecursiveCharacterTextSplitter(
-            separators=separators,
+            separators=list(separators),
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
         )
@@ -75,6 +88,14 @@ def auto_chunk_splitter(text: str) -> TextSplitter:
     return make_splitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
 
 
+def _newline_offsets(text: str) -> np.ndarray:
+    """Return the character offset of every ``\\n`` in *text*, in ascending order."""
+    # UTF-32 gives one fixed-width code unit per character, so array indices are
+    # str indices and the scan runs in C.
+    codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    return np.flatnonzero(codepoints == ord("\n"))
+
+
 def chunk_markdown(
     markdown: str,
     doc_id: str,
@@ -98,23 +119,158 @@ def chunk_markdown(
     splitter = text_splitter or make_splitter()
     chunk_texts = splitter.split_text(markdown)
 
-    chunks: list[ChunkMetadata] = []
-    search_start = 0
+    # Locate chunks in order, then resolve all line numbers in one vectorised
+    # binary search. Consecutive chunks share at most ``chunk_overlap`` characters,
+    # so the next chunk can't start before the end of this one minus the overlap;
+    # searching from there keeps each find() to about one stride of text. This is
+    # purely a speedup: like a one-character step it takes the first match, so a
+    # chunk whose text recurs nearby can still be placed at the wrong repeat.
+    # Starts never move backwards. A chunk that isn't found at or after the
+    # previous start is left unlocated: no character offsets, lines counted
+    # from its own text.
+    overlap: int | None = getattr(splitter, "_chunk_overlap", None)
+    if overlap and getattr(splitter, "_length_function", None) is not len:
+        overlap = None  # measured in tokens, not characters: no usable bound
+    # A chunk may start where the previous one did (the splitter can emit a
+    # chunk and then a longer one from the same offset), so the search floor is
+    # the previous start itself.
+    starts: list[int] = []
+    missing: list[int] = []  # indexes of chunks not found at or after the floor
+    floor = hint = 0
     for i, chunk_text in enumerate(chunk_texts):
-        start_char = markdown.find(chunk_text, search_start)
+        start_char = markdown.find(chunk_text, hint)
+        if start_char == -1 and hint > floor:
+            start_char = markdown.find(chunk_text, floor)
         if start_char == -1:
-            start_char = search_start
-        start_line = markdown[:start_char].count("\n") + 1
-        end_line = start_line + chunk_text.count("\n")
-        chunks.append(
-            ChunkMetadata(
-                doc_id=doc_id,
-                chunk_index=i,
-                start_line=start_line,
-                end_line=end_line,
-                text=chunk_text,
-            )
+            missing.append(i)
+            starts.append(floor)
+            hint = floor
+            continue
+        floor = start_char
+        stride = len(chunk_text) - overlap if overlap is not None else 1
+        hint = start_char + max(1, stride)
+        starts.append(start_char)
+
+    newlines = _newline_offsets(markdown)
+    start_arr = np.asarray(starts, dtype=np.intp)
+    ends = start_arr + np.fromiter(map(len, chunk_texts), dtype=np.intp, count=len(chunk_texts))
+    start_lines = (np.searchsorted(newlines, start_arr) + 1).tolist()
+    end_lines = (np.searchsorted(newlines, ends) + 1).tolist()
+    start_chars: list[int | None] = list(starts)
+    end_chars: list[int | None] = list(ends.tolist())
+    for i in missing:
+        # Not located, so no span of the text to measure: count the chunk's own
+        # lines and record no character offsets
+        end_lines[i] = start_lines[i] + chunk_texts[i].count("\n")
+        start_chars[i] = end_chars[i] = None
+
+    chunks = [
+        ChunkMetadata(
+            doc_id=doc_id,
+            chunk_index=i,
+            start_line=start_line,
+            end_line=end_line,
+            text=chunk_text,
+            start_char=start_char,
+            end_char=end_char,
+        )
+        for i, (chunk_text, start_line, end_line, start_char, end_char) in enumerate(
+            zip(chunk_texts, start_lines, end_lines, start_chars, end_chars, strict=True)
         )
-        search_start = start_char + 1
+    ]
 
     return chunks
+
+
+def chunk_markdown_structured(
+    markdown: str,
+    doc_id: str,
+    toc: list[TOCEntry],
+    text_splitter: TextSplitter | None = None,
+) -> list[ChunkMetadata]:
+    """Split markdown along its heading structure.
+
+    The document is cut into sections at every heading in *toc*. Consecutive
+    sections are packed into one chunk while they fit in the splitter's
+    ``chunk_size``; only sections larger than that are passed to the splitter.
+    Falls back to :func:`chunk_markdown` when there is no TOC or the splitter's
+    chunk size is not measured in characters.
+
+    Args:
+        markdown: Full markdown text.
+        doc_id: Parent document ID.
+        toc: Table of contents extracted from *markdown* (see ``extract_toc``).
+        text_splitter: Optional splitter implementing ``split_text()``. Defaults to
+            the markdown-aware splitter from :func:`make_splitter`.
+
+    Returns:
+        List of ``ChunkMetadata`` with accurate 1-indexed line numbers.
+    """
+    splitter = text_splitter or make_splitter()
+    chunk_size: int | None = getattr(splitter, "_chunk_size", None)
+    if (
+        not markdown
+        or not toc
+        or chunk_size is None
+        or getattr(splitter, "_length_function", None) is not len
+    ):
+        return chunk_markdown(markdown, doc_id, text_splitter=splitter)
+
+    lines = markdown.split("\n")
+    # Character offset where each line starts, plus one past the end of the text.
+    line_starts = [0]
+    for line in lines:
+        line_starts.append(line_starts[-1] + len(line) + 1)
+
+    def span_len(first: int, last: int) -> int:
+        return line_starts[last] - 1 - line_starts[first - 1]
+
+    def span(first: int, last: int) -> str:
+        return markdown[line_starts[first - 1] : line_starts[last] - 1]
+
+    bounds = sorted({1} | {e.start_line for e in toc if 1 <= e.start_line <= len(lines)})
+    bounds.append(len(lines) + 1)
+
+    # (start_line, end_line, start_char or None if not located, text)
+    pieces: list[tuple[int, int, int | None, str]] = []
+    packed: tuple[int, int] | None = None
+    for start, stop in zip(bounds, bounds[1:], strict=False):
+        first, last = start, stop - 1
+        while first <= last and not lines[first - 1].strip():
+            first += 1
+        while last >= first and not lines[last - 1].strip():
+            last -= 1
+        if first > last:
+            continue
+
+        if packed is not None and span_len(packed[0], last) <= chunk_size:
+            packed = (packed[0], last)
+            continue
+        if packed is not None:
+            pieces.append((packed[0], packed[1], line_starts[packed[0] - 1], span(*packed)))
+            packed = None
+
+        if span_len(first, last) <= chunk_size:
+            packed = (first, last)
+            continue
+        offset = line_starts[first - 1]
+        for sub in chunk_markdown(span(first, last), doc_id, text_splitter=splitter):
+            start_line, end_line = sub.start_line + first - 1, sub.end_line + first - 1
+            start_char = sub.start_char + offset if sub.start_char is not None else None
+            pieces.append((start_line, end_line, start_char, sub.text))
+
+    if packed is not None:
+        pieces.append((packed[0], packed[1], line_starts[packed[0] - 1], span(*packed)))
+
+    return [
+        ChunkMetadata(
+            doc_id=doc_id,
+            chunk_index=i,
+            start_line=start_line,
+            end_line=end_line,
+            text=text,
+            start_char=start_char,
+            end_char=start_char + len(text) if start_char is not None else None,
+        )
+        for i, (start_line, end_line, start_char, text) in enumerate(pieces)
+    ]
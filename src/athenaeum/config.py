@@ -14,3 +14,5 @@ class AthenaeumConfig:
     rrf_k: int = 60
     default_strategy: Literal["hybrid", "bm25", "vector"] = "hybrid"
     similarity_threshold: float | None = None  # Min cosine score [0,1]; None = no filter
+    embed_batch_size: int = 256  # Texts per embed_documents call
+    embed_max_concurrency: int = 1  # Parallel embedding batches; raise for remote APIs
@@ -2,63 +2,186 @@
 
 from __future__ import annotations
 
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+
 from athenaeum.models import Document
 from athenaeum.storage import StorageManager
 
 
 class DocumentStore:
-    """Manages the document registry backed by ``metadata.json``."""
+    """Manages the document registry backed by ``metadata.json``.
+
+    Records are kept as parsed JSON on load and only validated into
+    :class:`Document` objects the first time they are accessed.
+    """
 
     def __init__(self, storage: StorageManager) -> None:
         self._storage = storage
-        self._docs: dict[str, Document] = {}
+        # Registry order; values stay raw dicts until first accessed
+        self._docs: dict[str, Document | dict[str, Any]] = {}
+        # Inverted index tag -> doc IDs, plus the tags each doc was last indexed under
+        # (callers mutate ``doc.tags`` in place, so the doc itself can't tell us).
+        self._tag_index: defaultdict[str, set[str]] = defaultdict(set)
+        self._indexed_tags: dict[str, frozenset[str]] = {}
+        # Lazily built (doc IDs, lowercase names) in registry order; reset on any change
+        self._name_table: tuple[list[str], np.ndarray] | None = None
+        # doc ID -> formatted TOC; entries are dropped whenever the doc is re-added
+        self._toc_cache: dict[str, str] = {}
         self._load()
 
     def _load(self) -> None:
         raw = self._storage.load_metadata()
         docs_raw = raw.get("documents", {})
         for doc_id, data in docs_raw.items():
-            self._docs[doc_id] = Document.model_validate(data)
+            self._docs[doc_id] = data
+            self._index_tags(doc_id, data.get("tags", ()))
 
     def _save(self) -> None:
         data = {
             "documents": {
-                doc_id: doc.model_dump(mode="json") for doc_id, doc in self._docs.items()
+                # Records never accessed are written back exactly as they were read
+                doc_id: doc if isinstance(doc, dict) else _doc_to_dict(doc)
+                for doc_id, doc in self._docs.items()
             }
         }
         self._storage.save_metadata(data)
 
+    def _materialize(self, doc_id: str) -> Document:
+        doc = self._docs[doc_id]
+        if isinstance(doc, dict):
+            doc = self._docs[doc_id] = Document.model_validate(doc)
+        return doc
+
+    def _index_tags(self, doc_id: str, tags: Iterable[str]) -> None:
+        old = self._indexed_tags.get(doc_id, frozenset())
+        new = frozenset(tags)
+        for tag in old - new:
+            self._discard_posting(tag, doc_id)
+        for tag in new - old:
+            self._tag_index[tag].add(doc_id)
+        self._indexed_tags[doc_id] = new
+
+    def _unindex_tags(self, doc_id: str) -> None:
+        for tag in self._indexed_tags.pop(doc_id, frozenset()):
+            self._discard_posting(tag, doc_id)
+
+    def _discard_posting(self, tag: str, doc_id: str) -> None:
+        postings = self._tag_index[tag]
+        postings.discard(doc_id)
+        if not postings:
+            del self._tag_index[tag]
+
     def add(self, doc: Document) -> None:
         """Add or update a document in the registry."""
         self._docs[doc.id] = doc
+        self._index_tags(doc.id, doc.tags)
+        self._toc_cache.pop(doc.id, None)
+        self._name_table = None
+        self._save()
+
+    def add_many(self, docs: list[Document]) -> None:
+        """Add or update several documents, writing the registry once."""
+        for doc in docs:
+            self._docs[doc.id] = doc
+            self._index_tags(doc.id, doc.tags)
+            self._toc_cache.pop(doc.id, None)
+        self._name_table = None
         self._save()
 
     def get(self, doc_id: str) -> Document | None:
         """Get a document by ID, or None if not found."""
-        return self._docs.get(doc_id)
+        return self._materialize(doc_id) if doc_id in self._docs else None
+
+    def formatted_toc(self, doc_id: str) -> str:
+        """Return ``format_toc()`` of a registered document, cached until it is re-added."""
+        toc = self._toc_cache.get(doc_id)
+        if toc is None:
+            toc = self._toc_cache[doc_id] = self._materialize(doc_id).format_toc()
+        return toc
 
     def list_all(self) -> list[Document]:
         """Return all documents."""
-        return list(self._docs.values())
+        return [self._materialize(doc_id) for doc_id in self._docs]
+
+    def list_ids(self) -> list[str]:
+        """Return all document IDs, without loading the documents themselves."""
+        return list(self._docs)
 
     def remove(self, doc_id: str) -> Document | None:
         """Remove a document from the registry. Returns the removed doc or None."""
-        doc = self._docs.pop(doc_id, None)
-        if doc is not None:
-            self._save()
+        if doc_id not in self._docs:
+            return None
+        doc = self._materialize(doc_id)
+        del self._docs[doc_id]
+        self._unindex_tags(doc_id)
+        self._toc_cache.pop(doc_id, None)
+        self._name_table = None
+        self._save()
         return doc
 
+    def ids_by_tags(self, tags: set[str]) -> set[str]:
+        """Return IDs of documents matching ANY of the given tags (OR semantics)."""
+        return set().union(*(self._tag_index.get(t, ()) for t in tags))
+
     def list_by_tags(self, tags: set[str]) -> list[Document]:
         """Return documents matching ANY of the given tags (OR semantics)."""
-        return [doc for doc in self._docs.values() if doc.tags & tags]
+        ids = self.ids_by_tags(tags)
+        # Walk the registry rather than the id set so that the stable sort breaks
+        # created_at ties by registry order, not by set iteration order.
+        matches = [self._materialize(doc_id) for doc_id in self._docs if doc_id in ids]
+        return sorted(matches, key=lambda d: d.created_at)
 
     def list_tags(self) -> set[str]:
         """Return the union of all tags across all documents."""
-        result: set[str] = set()
-        for doc in self._docs.values():
-            result |= doc.tags
-        return result
+        return set(self._tag_index)
+
+    def lowercase_names(self) -> tuple[list[str], np.ndarray]:
+        """Return doc IDs and a parallel unicode array of their lowercased names.
+
+        Both are in registry order and cached until the next ``add``/``remove``,
+        so name lookups can be done with vectorised ``np.char`` operations.
+        """
+        if self._name_table is None:
+            ids = list(self._docs)
+            names = np.array(
+                [
+                    (doc["name"] if isinstance(doc, dict) else doc.name).lower()
+                    for doc in self._docs.values()
+                ],
+                dtype=str,
+            )
+            self._name_table = (ids, names)
+        return self._name_table
 
     @property
     def count(self) -> int:
         return len(self._docs)
+
+
+def _doc_to_dict(doc: Document) -> dict[str, Any]:
+    """Serialise *doc* like ``doc.model_dump(mode="json")``, without pydantic's overhead."""
+    return {
+        "id": doc.id,
+        "name": doc.name,
+        "path_to_raw": doc.path_to_raw,
+        "path_to_md": doc.path_to_md,
+        "num_lines": doc.num_lines,
+        "table_of_contents": [
+            {
+                "title": e.title,
+                "level": e.level,
+                "start_line": e.start_line,
+                "end_line": e.end_line,
+            }
+            for e in doc.table_of_contents
+        ],
+        # pydantic writes a zero UTC offset as "Z"
+        "created_at": doc.created_at.isoformat().replace("+00:00", "Z"),
+        "file_size": doc.file_size,
+        "file_type": doc.file_type,
+        "tags": list(doc.tags),
+    }
@@ -99,3 +99,9 @@ class ChunkMetadata(BaseModel):
     start_line: int = Field(..., description="Starting line number")
     end_line: int = Field(..., description="Ending line number")
     text: str = Field(..., description="Chunk text content")
+    start_char: int | None = Field(
+        None, description="Offset of the chunk's first character in the document markdown"
+    )
+    end_char: int | None = Field(
+        None, description="Offset one past the chunk's last character in the document markdown"
+    )
@@ -2,10 +2,20 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterator
+from itertools import islice
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from athenaeum.ocr.base import OCRProvider
 
+if TYPE_CHECKING:
+    from PIL.Image import Image
+
+# PDF pages are rasterised at 200 DPI (PDF user space is 72 units per inch)
+_PDF_RENDER_SCALE = 200 / 72
+_BATCH_SIZE = 4
+
 
 class LightOnOCR(OCRProvider):
     """Convert documents to markdown using LightOnOCR-2-1B (local model)."""
@@ -14,10 +24,11 @@ class LightOnOCR(OCRProvider):
 
     def __init__(self, device: str = "cpu") -> None:
         try:
+            import pypdfium2  # noqa: F401
             from transformers import pipeline
         except ImportError as e:
             raise ImportError(
-                "transformers/torch not installed. "
+                "transformers/torch/pypdfium2 not installed. "
                 "Install with: pip install 'athenaeum-kb[lighton]'"
             ) from e
         self._pipe = pipeline(
@@ -27,14 +38,38 @@ class LightOnOCR(OCRProvider):
         )
 
     def convert(self, file_path: Path) -> str:
-        from PIL import Image
-
-        image = Image.open(file_path)
-        result = self._pipe(image)
-        if isinstance(result, list) and len(result) > 0:
-            text: str = result[0].get("generated_text", "")
-            return text
-        return str(result)
+        # Pages are decoded lazily and sent through the model one batch at a
+        # time, so only a batch of rendered pages is held in memory at once.
+        pages = self._iter_pages(file_path)
+        texts: list[str] = []
+        while batch := list(islice(pages, _BATCH_SIZE)):
+            results: list[list[dict[str, Any]]] = self._pipe(batch, batch_size=_BATCH_SIZE)
+            texts.extend(str(result[0].get("generated_text", "")) for result in results)
+        return "\n\n".join(texts)
+
+    @staticmethod
+    def _iter_pages(file_path: Path) -> Iterator[Image]:
+        """Decode *file_path* into fully loaded RGB images, one page at a time."""
+        if file_path.suffix.lower() == ".pdf":
+            import pypdfium2
+
+            pdf = pypdfium2.PdfDocument(file_path)
+            try:
+                for index in range(len(pdf)):
+                    page = pdf[index]
+                    try:
+                        image = page.render(scale=_PDF_RENDER_SCALE).to_pil()
+                    finally:
+                        page.close()
+                    yield image
+            finally:
+                pdf.close()
+            return
+
+        from PIL import Image as PILImage
+
+        with PILImage.open(file_path) as image:
+            yield image.convert("RGB")
 
     def supported_extensions(self) -> set[str]:
         return self._EXTENSIONS
@@ -26,14 +26,15 @@ class MistralOCR(OCRProvider):
         self._client = Mistral(api_key=key)
 
     def convert(self, file_path: Path) -> str:
-        # Upload file to Mistral Cloud
-        uploaded_file = self._client.files.upload(
-            file={
-                "file_name": file_path.name,
-                "content": file_path.read_bytes(),
-            },
-            purpose="ocr",
-        )
+        # Upload file to Mistral Cloud, streaming it from disk rather than reading it into memory
+        with file_path.open("rb") as f:
+            uploaded_file = self._client.files.upload(
+                file={
+                    "file_name": file_path.name,
+                    "content": f,
+                },
+                purpose="ocr",
+            )
 
         try:
             # Get a signed URL to access the file
@@ -57,8 +58,7 @@ class MistralOCR(OCRProvider):
                 },
             )
 
-            pages = [page.markdown for page in response.pages]
-            return "\n\n".join(pages)
+            return "\n\n".join(page.markdown for page in response.pages)
         finally:
             # Clean up: delete the file from Mistral Cloud
             self._client.files.delete(file_id=uploaded_file.id)
@@ -1,48 +1,187 @@
-"""BM25 keyword search index."""
+"""BM25 keyword search index backed by bm25s sparse-matrix scoring."""
 
 from __future__ import annotations
 
+import contextlib
+import json
+import re
+import shutil
+import sys
+from collections import defaultdict
+from collections.abc import Iterable
 from dataclasses import dataclass
+from pathlib import Path
 
-from rank_bm25 import BM25Okapi
+import bm25s
+import numpy as np
+import Stemmer
+from bm25s.stopwords import STOPWORDS_EN
 
 from athenaeum.models import ChunkMetadata
+from athenaeum.search.hybrid import top_k_indices
+
+_STEMMER = Stemmer.Stemmer("english")
+_STOPWORDS = frozenset(STOPWORDS_EN)
+# bm25s' default (scikit-learn style) token pattern, plus an ASCII-only variant
+# that finds the same tokens on ASCII text but matches considerably faster.
+_TOKEN_RE = re.compile(r"(?u)\b\w\w+\b")
+_ASCII_TOKEN_RE = re.compile(r"\b\w\w+\b", re.ASCII)
+_CHUNKS_FILE = "chunks.jsonl"
+_TOKENS_FILE = "tokens.jsonl"
+_DOCS_FILE = "docs.jsonl"
+_PARAMS_FILE = "params.index.json"
+_SCORES_TMP_DIR = "scores.tmp"
 
 
 @dataclass
 class _Entry:
     chunk: ChunkMetadata
-    tokens: list[str]
+    tokens: list[str] | None  # None until tokenised (e.g. entries loaded from disk)
 
 
 class BM25Index:
-    """In-memory BM25 index over document chunks."""
+    """In-memory BM25 index over document chunks.
+
+    bm25s can't update its score matrix in place, so changes only mark the index
+    dirty; the matrix is rebuilt once, on the next search (or :meth:`build`), and
+    written next to the index's on-disk copy when that copy is up to date.
+    """
 
     def __init__(self) -> None:
         self._entries: list[_Entry] = []
-        self._bm25: BM25Okapi | None = None
+        # Every indexed doc ID in insertion order, including docs without chunks
+        self._doc_ids: dict[str, None] = {}
+        self._retriever: bm25s.BM25 | None = None
+        self._dirty = False
+        # Lazily built doc ID -> sorted entry rows; reset whenever entries change
+        self._rows_by_doc: dict[str, np.ndarray] | None = None
+        # On-disk copy: its directory, how many leading entries and doc IDs it
+        # holds, and whether it must be rewritten rather than appended to
+        self._path: Path | None = None
+        self._persisted = 0
+        self._persisted_docs = 0
+        self._rewrite = False
+
+    def build(self) -> None:
+        """Rebuild the score matrices now if they are stale, and persist them."""
+        self._ensure_built()
+
+    def _ensure_built(self) -> None:
+        if self._dirty:
+            self._rebuild()
+            self._dirty = False
+            # The matrices are derived from the saved tokens, so failing to
+            # write them only costs a rebuild after the next load
+            with contextlib.suppress(OSError):
+                self._save_scores()
+
+    def _save_scores(self) -> None:
+        """Write the score matrices into the on-disk copy, if it matches memory."""
+        path = self._path
+        if (
+            self._retriever is None
+            or path is None
+            or self._rewrite
+            or self._persisted != len(self._entries)
+            or not path.exists()
+        ):
+            return
+        tmp = path / _SCORES_TMP_DIR
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        self._retriever.save(str(tmp), show_progress=False)
+        # Without the params file load() ignores the matrices, so drop it while
+        # the arrays are swapped in and move the new one in last
+        (path / _PARAMS_FILE).unlink(missing_ok=True)
+        for file in tmp.iterdir():
+            if file.name != _PARAMS_FILE:
+                file.replace(path / file.name)
+        (tmp / _PARAMS_FILE).replace(path / _PARAMS_FILE)
+        tmp.rmdir()
 
     def _rebuild(self) -> None:
-        if self._entries:
-            corpus = [e.tokens for e in self._entries]
-            self._bm25 = BM25Okapi(corpus)
+        pending = [e for e in self._entries if e.tokens is None]
+        if pending:
+            token_lists = self._tokenize([e.chunk.text for e in pending])
+            for entry, tokens in zip(pending, token_lists, strict=True):
+                entry.tokens = tokens
+        corpus = [e.tokens or [] for e in self._entries]
+        if any(corpus):
+            self._retriever = bm25s.BM25()
+            self._retriever.index(corpus, show_progress=False)
         else:
-            self._bm25 = None
+            self._retriever = None
 
     @staticmethod
-    def _tokenize(text: str) -> list[str]:
-        return text.lower().split()
+    def _tokenize(texts: list[str]) -> list[list[str]]:
+        """Lowercase, split, drop English stopwords and stem each text.
+
+        Produces the same tokens as ``bm25s.tokenize(stopwords="en", stemmer=...)``
+        without its per-text overhead; each distinct word is stemmed once, and
+        stems are interned so every occurrence across the corpus shares one string.
+        """
+        words = [
+            [
+                w
+                for w in (_ASCII_TOKEN_RE if text.isascii() else _TOKEN_RE).findall(text.lower())
+                if w not in _STOPWORDS
+            ]
+            for text in texts
+        ]
+        unique = list({w for ws in words for w in ws})
+        stems = dict(zip(unique, map(sys.intern, _STEMMER.stemWords(unique)), strict=True))
+        return [[stems[w] for w in ws] for ws in words]
 
-    def add_chunks(self, chunks: list[ChunkMetadata]) -> None:
-        """Add chunks to the index and rebuild."""
-        for chunk in chunks:
-            self._entries.append(_Entry(chunk=chunk, tokens=self._tokenize(chunk.text)))
-        self._rebuild()
+    @staticmethod
+    def tokenize_chunks(chunks: list[ChunkMetadata]) -> list[list[str]]:
+        """Tokenise chunk texts exactly as :meth:`add_chunks` would.
+
+        A pure function of its input, so callers can run it in worker processes
+        and hand the results to :meth:`add_chunks`.
+        """
+        return BM25Index._tokenize([c.text for c in chunks])
+
+    def add_chunks(
+        self,
+        chunks: list[ChunkMetadata],
+        token_lists: list[list[str]] | None = None,
+        doc_ids: Iterable[str] = (),
+    ) -> None:
+        """Tokenise and add chunks to the index.
+
+        Args:
+            chunks: Chunks to add.
+            token_lists: Tokens for each chunk from :meth:`tokenize_chunks`, if
+                already computed.
+            doc_ids: Documents the chunks were taken from. They are recorded as
+                indexed even when they produced no chunks at all.
+        """
+        self._doc_ids.update(dict.fromkeys(doc_ids))
+        self._doc_ids.update(dict.fromkeys(c.doc_id for c in chunks))
+        if not chunks:
+            return
+        if token_lists is None:
+            token_lists = self.tokenize_chunks(chunks)
+        for chunk, tokens in zip(chunks, token_lists, strict=True):
+            self._entries.append(_Entry(chunk=chunk, tokens=tokens))
+        self._rows_by_doc = None
+        self._dirty = True
 
     def remove_document(self, doc_id: str) -> None:
-        """Remove all chunks for a document and rebuild."""
-        self._entries = [e for e in self._entries if e.chunk.doc_id != doc_id]
-        self._rebuild()
+        """Remove all chunks for a document."""
+        self.remove_documents({doc_id})
+
+    def remove_documents(self, doc_ids: set[str]) -> None:
+        """Remove all chunks for several documents."""
+        for doc_id in doc_ids & self._doc_ids.keys():
+            del self._doc_ids[doc_id]
+            self._rewrite = True
+        kept = [e for e in self._entries if e.chunk.doc_id not in doc_ids]
+        if len(kept) != len(self._entries):
+            self._entries = kept
+            self._rows_by_doc = None
+            self._dirty = True
+            self._rewrite = True
 
     def search(
         self,
@@ -52,23 +191,174 @@ class BM25Index:
         doc_ids: set[str] | None = None,
     ) -> list[tuple[ChunkMetadata, float]]:
         """Search the index, returning (chunk, score) pairs sorted by score descending."""
-        if not self._bm25 or not self._entries:
+        self._ensure_built()
+        if self._retriever is None or not self._entries:
             return []
 
-        tokens = self._tokenize(query)
-        scores = self._bm25.get_scores(tokens)
+        tokens = self._tokenize([query])[0]
+        if doc_id is not None or doc_ids is not None:
+            # Score only the rows of the requested documents
+            selected = {doc_id} if doc_id is not None else set(doc_ids or ())
+            if doc_id is not None and doc_ids is not None:
+                selected &= doc_ids
+            rows = self._rows_for(selected)
+            scores = self._score_rows(self._retriever, tokens, rows)
+            ranked = top_k_indices(scores, top_k)
+            return [(self._entries[rows[i]].chunk, float(scores[i])) for i in ranked]
+
+        if tokens:
+            scores = self._retriever.get_scores(tokens)
+        else:
+            scores = np.zeros(len(self._entries), dtype=np.float32)
+        return [(self._entries[i].chunk, float(scores[i])) for i in top_k_indices(scores, top_k)]
+
+    def _rows_for(self, doc_ids: set[str]) -> np.ndarray:
+        """Return the sorted entry rows belonging to *doc_ids*."""
+        if self._rows_by_doc is None:
+            rows_by_doc: defaultdict[str, list[int]] = defaultdict(list)
+            for row, entry in enumerate(self._entries):
+                rows_by_doc[entry.chunk.doc_id].append(row)
+            self._rows_by_doc = {d: np.asarray(r, dtype=np.intp) for d, r in rows_by_doc.items()}
+        parts = [self._rows_by_doc[d] for d in doc_ids if d in self._rows_by_doc]
+        if not parts:
+            return np.empty(0, dtype=np.intp)
+        return parts[0] if len(parts) == 1 else np.sort(np.concatenate(parts))
+
+    @staticmethod
+    def _score_rows(retriever: bm25s.BM25, tokens: list[str], rows: np.ndarray) -> np.ndarray:
+        """BM25 scores of *tokens* for the given sorted *rows* only.
 
-        results: list[tuple[ChunkMetadata, float]] = []
-        for i, score in enumerate(scores):
-            entry = self._entries[i]
-            if doc_id is not None and entry.chunk.doc_id != doc_id:
-                continue
-            if doc_ids is not None and entry.chunk.doc_id not in doc_ids:
-                continue
-            results.append((entry.chunk, float(score)))
+        Equivalent to ``get_scores(tokens)[rows]``, but each query token's posting
+        list (whose doc indices bm25s keeps sorted) is binary-searched for the
+        rows instead of being scattered over the whole corpus.
+        """
+        matrix = retriever.scores
+        data, indices, indptr = matrix["data"], matrix["indices"], matrix["indptr"]
+        scores = np.zeros(len(rows), dtype=data.dtype)
+        if not len(rows):
+            return scores
+        token_ids = retriever.get_tokens_ids(tokens)
+        for token_id in token_ids:
+            start, end = int(indptr[token_id]), int(indptr[token_id + 1])
+            postings = indices[start:end]
+            pos = np.searchsorted(postings, rows)
+            hit = pos < len(postings)
+            hit[hit] = postings[pos[hit]] == rows[hit]
+            scores[hit] += data[start + pos[hit]]
+        nonoccurrence = retriever.nonoccurrence_array
+        if nonoccurrence is not None and token_ids:
+            scores += nonoccurrence[token_ids].sum()
+        return scores
+
+    def save(self, path: Path) -> None:
+        """Persist the index to the directory *path*.
+
+        When *path* already holds this index's earlier state, only entries added
+        since are appended to it. Otherwise (first save, or after removals) the
+        whole index is written to a sibling directory and swapped in, so readers
+        never observe a half-written index. Up-to-date score matrices are written
+        with it; stale ones are written by the rebuild that refreshes them. Until
+        then :meth:`load` leaves the index dirty and it is rebuilt from the saved
+        tokens on first search.
+        """
+        if path == self._path and not self._rewrite and path.exists():
+            self._append(path)
+        else:
+            self._write_all(path)
 
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_k]
+    def _append(self, path: Path) -> None:
+        new = self._entries[self._persisted :]
+        # One write per file keeps a crash from leaving more than a torn last line
+        if new:
+            with (path / _CHUNKS_FILE).open("a") as f:
+                f.write("".join(f"{e.chunk.model_dump_json()}\n" for e in new))
+            with (path / _TOKENS_FILE).open("a") as f:
+                f.write("".join(f"{json.dumps(e.tokens)}\n" for e in new))
+            self._persisted = len(self._entries)
+        new_docs = list(self._doc_ids)[self._persisted_docs :]
+        if new_docs:
+            with (path / _DOCS_FILE).open("a") as f:
+                f.write("".join(f"{json.dumps(d)}\n" for d in new_docs))
+            self._persisted_docs = len(self._doc_ids)
+
+    def _write_all(self, path: Path) -> None:
+        tmp = path.with_name(f"{path.name}.tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        if self._retriever is not None and not self._dirty:
+            self._retriever.save(str(tmp), show_progress=False)
+        with (tmp / _CHUNKS_FILE).open("w") as f:
+            for entry in self._entries:
+                f.write(entry.chunk.model_dump_json())
+                f.write("\n")
+        # Without tokens for every entry the copy can't be appended to later
+        has_tokens = all(e.tokens is not None for e in self._entries)
+        if has_tokens:
+            with (tmp / _TOKENS_FILE).open("w") as f:
+                for entry in self._entries:
+                    f.write(json.dumps(entry.tokens))
+                    f.write("\n")
+        with (tmp / _DOCS_FILE).open("w") as f:
+            for doc_id in self._doc_ids:
+                f.write(json.dumps(doc_id))
+                f.write("\n")
+        if path.exists():
+            shutil.rmtree(path)
+        tmp.rename(path)
+        self._path = path
+        self._persisted = len(self._entries)
+        self._persisted_docs = len(self._doc_ids)
+        self._rewrite = not has_tokens
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> BM25Index:
+        """Load an index previously written by :meth:`save`.
+
+        Args:
+            path: Directory the index was saved to.
+            mmap: Memory-map the score matrices instead of reading them into RAM.
+        """
+        index = cls()
+        with (path / _CHUNKS_FILE).open() as f:
+            for line in f:
+                chunk = ChunkMetadata.model_validate_json(line)
+                index._entries.append(_Entry(chunk=chunk, tokens=None))
+        # Docs without chunks are only known from the docs file; older copies lack it
+        docs_path = path / _DOCS_FILE
+        if docs_path.exists():
+            with docs_path.open() as f:
+                index._doc_ids = dict.fromkeys(json.loads(line) for line in f)
+        index._persisted_docs = len(index._doc_ids)
+        index._doc_ids.update(dict.fromkeys(e.chunk.doc_id for e in index._entries))
+        # Tokens are optional: without them entries are re-tokenised on the next rebuild
+        tokens_path = path / _TOKENS_FILE
+        has_tokens = False
+        if tokens_path.exists():
+            with tokens_path.open() as f:
+                token_lists = [list(map(sys.intern, json.loads(line))) for line in f]
+            if len(token_lists) == len(index._entries):
+                for entry, tokens in zip(index._entries, token_lists, strict=True):
+                    entry.tokens = tokens
+                has_tokens = True
+        # Matrices describe the entries of the last build; appends since make them stale
+        params_path = path / _PARAMS_FILE
+        if (
+            params_path.exists()
+            and json.loads(params_path.read_text()).get("num_docs") == len(index._entries)
+        ):
+            index._retriever = bm25s.BM25.load(str(path), mmap=mmap, show_progress=False)
+        else:
+            index._dirty = bool(index._entries)
+        index._path = path
+        index._persisted = len(index._entries)
+        index._rewrite = not has_tokens
+        return index
+
+    @property
+    def doc_ids(self) -> set[str]:
+        """IDs of all indexed documents, including those that produced no chunks."""
+        return set(self._doc_ids)
 
     @property
     def size(self) -> int:
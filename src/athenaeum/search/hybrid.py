@@ -2,9 +2,28 @@
 
 from __future__ import annotations
 
+import numpy as np
+
 from athenaeum.models import ChunkMetadata
 
 
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Return indices of the *top_k* highest scores, best first.
+
+    Uses ``np.argpartition`` to avoid a full sort; ties keep index order, exactly
+    as a stable descending sort would.
+    """
+    n = len(scores)
+    if top_k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if top_k < n:
+        threshold = scores[np.argpartition(-scores, top_k - 1)[top_k - 1]]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")][:top_k]
+
+
 def reciprocal_rank_fusion(
     ranked_lists: list[list[tuple[ChunkMetadata, float]]],
     k: int = 60,
@@ -23,15 +42,26 @@ def reciprocal_rank_fusion(
     Returns:
         Merged and re-ranked list of (chunk, rrf_score) pairs.
     """
-    scores: dict[str, float] = {}
-    chunks: dict[str, ChunkMetadata] = {}
+    slots: dict[tuple[str, int], int] = {}
+    chunks: list[ChunkMetadata] = []
+    positions: list[int] = []
+    ranks: list[int] = []
 
     for ranked_list in ranked_lists:
         for rank, (chunk, _score) in enumerate(ranked_list, start=1):
-            key = f"{chunk.doc_id}:{chunk.chunk_index}"
-            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
-            chunks[key] = chunk
+            key = (chunk.doc_id, chunk.chunk_index)
+            slot = slots.get(key)
+            if slot is None:
+                slot = slots[key] = len(chunks)
+                chunks.append(chunk)
+            else:
+                chunks[slot] = chunk
+            positions.append(slot)
+            ranks.append(rank)
+
+    if not chunks:
+        return []
 
-    merged = [(chunks[key], score) for key, score in scores.items()]
-    merged.sort(key=lambda x: x[1], reverse=True)
-    return merged[:top_k]
+    weights = 1.0 / (k + np.asarray(ranks, dtype=np.float64))
+    scores = np.bincount(np.asarray(positions), weights=weights, minlength=len(chunks))
+    return [(chunks[i], float(scores[i])) for i in top_k_indices(scores, top_k)]
@@ -2,23 +2,59 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 
 from langchain_chroma import Chroma
 from langchain_core.embeddings import Embeddings
 
 from athenaeum.models import ChunkMetadata
 
+_EMBED_BATCH_SIZE = 256  # texts per embed_documents call; stays under common provider limits
+
+
+def _chunk_to_metadata(chunk: ChunkMetadata) -> dict[str, str | int]:
+    """Chroma metadata for *chunk*: ``chunk.model_dump(exclude_none=True)`` minus its text.
+
+    The text is stored once, as the Chroma document, rather than repeated here.
+    """
+    meta: dict[str, str | int] = {
+        "doc_id": chunk.doc_id,
+        "chunk_index": chunk.chunk_index,
+        "start_line": chunk.start_line,
+        "end_line": chunk.end_line,
+    }
+    if chunk.start_char is not None:
+        meta["start_char"] = chunk.start_char
+    if chunk.end_char is not None:
+        meta["end_char"] = chunk.end_char
+    return meta
+
 
 class VectorIndex:
-    """Vector similarity search backed by Chroma."""
+    """Vector similarity search backed by Chroma.
+
+    Args:
+        embeddings: Embedding model used for chunks and queries.
+        persist_directory: Chroma persistence directory; in-memory when ``None``.
+        collection_name: Chroma collection name.
+        batch_size: Texts per ``embed_documents`` call.
+        max_concurrency: Batches embedded in parallel. Raise it for remote embedding
+            APIs; keep 1 for local models that already saturate the device.
+    """
 
     def __init__(
         self,
         embeddings: Embeddings,
         persist_directory: str | Path | None = None,
         collection_name: str = "athenaeum",
+        batch_size: int = _EMBED_BATCH_SIZE,
+        max_concurrency: int = 1,
     ) -> None:
+        if batch_size < 1 or max_concurrency < 1:
+            raise ValueError("batch_size and max_concurrency must be at least 1")
         kwargs: dict[str, object] = {
             "embedding_function": embeddings,
             "collection_name": collection_name,
@@ -28,19 +64,53 @@ class VectorIndex:
             kwargs["persist_directory"] = str(persist_directory)
         self._store = Chroma(**kwargs)  # type: ignore[arg-type]
         self._embeddings = embeddings
+        self._batch_size = batch_size
+        self._max_concurrency = max_concurrency
 
     def add_chunks(self, chunks: list[ChunkMetadata]) -> None:
-        """Add chunks to the vector store."""
-        if not chunks:
-            return
-        texts = [c.text for c in chunks]
-        metadatas = [c.model_dump() for c in chunks]
-        ids = [f"{c.doc_id}:{c.chunk_index}" for c in chunks]
-        self._store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+        """Add chunks to the vector store.
+
+        Chunks are embedded with one ``embed_documents`` call per batch (up to
+        ``max_concurrency`` batches at a time) and written to the collection, in
+        order, with precomputed embeddings.
+        """
+        batches = [
+            chunks[start : start + self._batch_size]
+            for start in range(0, len(chunks), self._batch_size)
+        ]
+        if self._max_concurrency > 1 and len(batches) > 1:
+            workers = min(self._max_concurrency, len(batches))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for batch, vectors in zip(
+                    batches, pool.map(self._embed_batch, batches), strict=True
+                ):
+                    self._upsert(batch, vectors)
+        else:
+            for batch in batches:
+                self._upsert(batch, self._embed_batch(batch))
+
+    def _embed_batch(self, batch: list[ChunkMetadata]) -> list[list[float]]:
+        return self._embeddings.embed_documents([c.text for c in batch])
+
+    def _upsert(self, batch: list[ChunkMetadata], vectors: list[list[float]]) -> None:
+        self._store._collection.upsert(
+            ids=[f"{c.doc_id}:{c.chunk_index}" for c in batch],
+            embeddings=vectors,  # type: ignore[arg-type]
+            metadatas=[_chunk_to_metadata(c) for c in batch],
+            documents=[c.text for c in batch],
+        )
 
     def remove_document(self, doc_id: str) -> None:
         """Remove all chunks for a document from the vector store."""
-        self._store._collection.delete(where={"doc_id": doc_id})
+        self.remove_documents({doc_id})
+
+    def remove_documents(self, doc_ids: Iterable[str]) -> None:
+        """Remove all chunks for several documents with a single delete."""
+        ids = sorted(set(doc_ids))
+        if not ids:
+            return
+        where: dict[str, Any] = {"doc_id": ids[0] if len(ids) == 1 else {"$in": ids}}
+        self._store._collection.delete(where=where)
 
     def search(
         self,
@@ -67,12 +137,15 @@ class VectorIndex:
             if similarity_threshold is not None and score < similarity_threshold:
                 continue
             meta = doc.metadata
-            chunk = ChunkMetadata(
+            # Metadata was written by add_chunks from validated chunks: skip re-validation
+            chunk = ChunkMetadata.model_construct(
                 doc_id=meta["doc_id"],
                 chunk_index=meta["chunk_index"],
                 start_line=meta["start_line"],
                 end_line=meta["end_line"],
-                text=meta["text"],
+                text=doc.page_content,
+                start_char=meta.get("start_char"),
+                end_char=meta.get("end_char"),
             )
             output.append((chunk, float(score)))
 
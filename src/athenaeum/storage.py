@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
-import json
+import os
 import shutil
 from pathlib import Path
 from typing import Any
 
+import orjson
+
 
 class StorageManager:
     """Manages the on-disk layout under the storage root.
@@ -17,6 +19,7 @@ class StorageManager:
             docs/<doc_id>/raw.*       # original file
             docs/<doc_id>/content.md  # converted markdown
             index/chroma/             # Chroma persistent directory
+            index/bm25/               # persisted BM25 index
             metadata.json             # document registry
     """
 
@@ -32,6 +35,10 @@ class StorageManager:
     def chroma_dir(self) -> Path:
         return self.root / "index" / "chroma"
 
+    @property
+    def bm25_dir(self) -> Path:
+        return self.root / "index" / "bm25"
+
     @property
     def metadata_path(self) -> Path:
         return self.root / "metadata.json"
@@ -45,6 +52,18 @@ class StorageManager:
         """Return path for storing the original file."""
         return self.doc_dir(doc_id) / f"raw{suffix}"
 
+    def store_raw(self, doc_id: str, src: Path, suffix: str) -> Path:
+        """Copy *src* into the document's directory as ``raw<suffix>``.
+
+        Uses ``os.copy_file_range`` where available so the data stays in the
+        kernel (and copy-on-write filesystems can reflink it), falling back to
+        ``shutil.copy2``. File metadata is preserved either way.
+        """
+        dest = self.raw_path(doc_id, suffix)
+        if not _copy_file_range(src, dest):
+            shutil.copy2(src, dest)
+        return dest
+
     def content_md_path(self, doc_id: str) -> Path:
         """Return path for the converted markdown."""
         return self.doc_dir(doc_id) / "content.md"
@@ -61,8 +80,28 @@ class StorageManager:
 
     def load_metadata(self) -> dict[str, Any]:
         if self.metadata_path.exists():
-            return json.loads(self.metadata_path.read_text())  # type: ignore[no-any-return]
+            return orjson.loads(self.metadata_path.read_bytes())  # type: ignore[no-any-return]
         return {}
 
     def save_metadata(self, data: dict[str, Any]) -> None:
-        self.metadata_path.write_text(json.dumps(data, indent=2, default=str))
+        self.metadata_path.write_bytes(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2))
+
+
+def _copy_file_range(src: Path, dest: Path) -> bool:
+    """Copy *src* to *dest* in-kernel. Returns ``False`` if unsupported here."""
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is None:
+        return False
+    try:
+        with src.open("rb") as fsrc, dest.open("wb") as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except OSError:
+        # e.g. EXDEV across filesystems on older kernels, or EINVAL/ENOSYS
+        return False
+    shutil.copystat(src, dest)
+    return True
@@ -3,10 +3,13 @@
 from __future__ import annotations
 
 import re
+import sys
 
 from athenaeum.models import TOCEntry
 
-_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+)$")
+# An ATX heading line: optional surrounding whitespace, 1-6 hashes, whitespace
+# and a non-blank title. ``[^\S\n]`` is whitespace within the line.
+_HEADING_RE = re.compile(r"^[^\S\n]*(#{1,6})[^\S\n]+(\S(?:[^\n]*\S)?)[^\S\n]*$", re.MULTILINE)
 
 
 def extract_toc(markdown: str) -> list[TOCEntry]:
@@ -17,33 +20,60 @@ def extract_toc(markdown: str) -> list[TOCEntry]:
     line before the next heading at the same or higher level, or to the last
     line of the document for the final entry.
     """
-    lines = markdown.split("\n")
-    entries: list[TOCEntry] = []
-
-    for line_no_0, line in enumerate(lines):
-        m = _HEADING_RE.match(line.strip())
-        if m:
-            level = len(m.group(1))
-            title = m.group(2).strip()
-            entries.append(
-                TOCEntry(title=title, level=level, start_line=line_no_0 + 1, end_line=None)
-            )
-
-    # Fill in end_line for each entry
-    total_lines = len(lines)
-    for i, entry in enumerate(entries):
-        # Find next entry at same or higher (lower number) level
-        end = total_lines
-        for j in range(i + 1, len(entries)):
-            if entries[j].level <= entry.level:
-                end = entries[j].start_line - 1
-                break
-        else:
-            # Last entry at this level — ends at document end
-            if i + 1 < len(entries):
-                end = entries[-1].start_line - 1
-                # Actually, just go to end of document
-                end = total_lines
-        entry.end_line = end
-
-    return entries
+    if "#" not in markdown:
+        return []  # no heading can match; a single C-level scan of the text
+    titles: list[str] = []
+    levels: list[int] = []
+    starts: list[int] = []
+
+    # Scan for heading lines only, without splitting the document into lines;
+    # line numbers are tracked by counting newlines since the previous match, so
+    # the text is scanned for newlines exactly once. CRLF line endings need no
+    # special handling: the trailing "\r" is whitespace within the line.
+    line_no, last_pos = 1, 0
+    count, intern = markdown.count, sys.intern  # bound once
+    for m in _HEADING_RE.finditer(markdown):
+        start = m.start()
+        line_no += count("\n", last_pos, start)
+        last_pos = start
+        # Interned: the same section names ("Examples", "Notes") recur across documents
+        hashes, title = m.groups()
+        titles.append(intern(title))
+        levels.append(len(hashes))
+        starts.append(line_no)
+
+    if not starts:
+        return []
+    total_lines = line_no + markdown.count("\n", last_pos)
+    # End lines are computed on the plain level/start columns, so each TOCEntry is
+    # built complete instead of being patched through pydantic's __setattr__.
+    ends = _section_ends(levels, starts, total_lines)
+    return [
+        TOCEntry(title=title, level=level, start_line=start_line, end_line=end_line)
+        for title, level, start_line, end_line in zip(titles, levels, starts, ends, strict=True)
+    ]
+
+
+def _section_ends(levels: list[int], starts: list[int], total_lines: int) -> list[int]:
+    """Return each section's end line.
+
+    That is the line before the next heading at the same or higher level, or
+    *total_lines* when there is none.
+    """
+    if len(set(levels)) == 1:
+        # Flat TOC (the common all-"##" case): every section ends where the next begins
+        return [start - 1 for start in starts[1:]] + [total_lines]
+
+    # One right-to-left pass. The stack holds (level, start_line) of the headings
+    # that could still close an earlier section; after popping the deeper ones, the
+    # top is the next heading at the same or higher level.
+    ends = [total_lines] * len(starts)
+    stack: list[tuple[int, int]] = []
+    for i in range(len(starts) - 1, -1, -1):
+        level = levels[i]
+        while stack and stack[-1][0] > level:
+            stack.pop()
+        if stack:
+            ends[i] = stack[-1][1] - 1
+        stack.append((level, starts[i]))
+    return ends
@@ -4,21 +4,83 @@ from __future__ import annotations
 
 from pathlib import Path
 
+import numpy as np
 import pytest
+from langchain_core.embeddings import Embeddings
+
+from athenaeum.models import TOCEntry
+from athenaeum.toc import extract_toc
 
 FIXTURES_DIR = Path(__file__).parent / "fixtures"
 
 
-@pytest.fixture
+class FakeEmbeddings(Embeddings):
+    """Deterministic fake embeddings for testing."""
+
+    # Pure, so vectors are memoised across the session as compact read-only
+    # arrays; lists are only built at the Embeddings interface.
+    _cache: dict[str, np.ndarray] = {}
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self._fill(texts)
+        return [self._cache[t].tolist() for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self._fill([text])
+        result: list[float] = self._cache[text].tolist()
+        return result
+
+    @classmethod
+    def _fill(cls, texts: list[str]) -> None:
+        # Simple hash-based embedding to 32 dims: byte i adds to slot i % 32.
+        # Uncached texts are embedded together: their bytes are zero-padded to
+        # a multiple of 32 and folded into one (n, 32) matrix.
+        missing = [t for t in dict.fromkeys(texts) if t not in cls._cache]
+        if not missing:
+            return
+        encoded = [t.encode() for t in missing]
+        width = max(-(-len(b) // 32) * 32 for b in encoded) or 32
+        data = np.zeros((len(missing), width), dtype=np.float64)
+        for row, b in zip(data, encoded, strict=True):
+            row[: len(b)] = np.frombuffer(b, dtype=np.uint8)
+        vecs = data.reshape(len(missing), -1, 32).sum(axis=1) / 256.0
+        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+        np.divide(vecs, norms, out=vecs, where=norms > 0)
+        vecs.setflags(write=False)
+        cls._cache.update(zip(missing, vecs, strict=True))
+
+
+@pytest.fixture(scope="session")
+def fake_embeddings() -> FakeEmbeddings:
+    return FakeEmbeddings()
+
+
+@pytest.fixture(scope="session")
 def sample_md_path() -> Path:
     return FIXTURES_DIR / "sample.md"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_txt_path() -> Path:
     return FIXTURES_DIR / "sample.txt"
 
 
-@pytest.fixture
-def sample_md_text(sample_md_path: Path) -> str:
-    return sample_md_path.read_text()
+@pytest.fixture(scope="session")
+def sample_md_bytes(sample_md_path: Path) -> bytes:
+    return sample_md_path.read_bytes()
+
+
+@pytest.fixture(scope="session")
+def sample_md_text(sample_md_bytes: bytes) -> str:
+    return sample_md_bytes.decode("utf-8")
+
+
+@pytest.fixture(scope="session")
+def sample_md_lines(sample_md_text: str) -> list[str]:
+    return sample_md_text.split("\n")
+
+
+@pytest.fixture(scope="session")
+def parsed_toc(sample_md_text: str) -> list[TOCEntry]:
+    """TOC of ``sample.md``, parsed once per session; treat as read-only."""
+    return extract_toc(sample_md_text)
@@ -2,40 +2,23 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
-from langchain_core.embeddings import Embeddings
 
 from athenaeum import Athenaeum, AthenaeumConfig
 from athenaeum.models import ContentSearchHit, DocSummary, SearchHit
-
-
-class FakeEmbeddings(Embeddings):
-    """Deterministic fake embeddings for testing."""
-
-    def embed_documents(self, texts: list[str]) -> list[list[float]]:
-        return [self._embed(t) for t in texts]
-
-    def embed_query(self, text: str) -> list[float]:
-        return self._embed(text)
-
-    @staticmethod
-    def _embed(text: str) -> list[float]:
-        vec = [0.0] * 32
-        for i, ch in enumerate(text.encode()):
-            vec[i % 32] += ch / 256.0
-        norm = sum(x * x for x in vec) ** 0.5
-        if norm > 0:
-            vec = [x / norm for x in vec]
-        return vec
+from tests.conftest import FakeEmbeddings
 
 
 @pytest.fixture
-def athenaeum(tmp_path: Path) -> Athenaeum:
+def athenaeum(tmp_path: Path, fake_embeddings: FakeEmbeddings) -> Iterator[Athenaeum]:
     from athenaeum.chunker import make_splitter
     config = AthenaeumConfig(storage_dir=tmp_path / "athenaeum")
-    return Athenaeum(embeddings=FakeEmbeddings(), config=config, text_splitter=make_splitter(chunk_size=200, chunk_overlap=50))
+    splitter = make_splitter(chunk_size=200, chunk_overlap=50)
+    with Athenaeum(embeddings=fake_embeddings, config=config, text_splitter=splitter) as kb:
+        yield kb
 
 
 def test_load_doc_md(athenaeum: Athenaeum, sample_md_path: Path) -> None:
@@ -54,6 +37,75 @@ def test_load_doc_not_found(athenaeum: Athenaeum) -> None:
         athenaeum.load_doc("/nonexistent/file.md")
 
 
+def test_load_doc_unsupported_extension(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
+    from athenaeum.ocr.custom import CustomOCR
+
+    calls = 0
+
+    class CountingOCR(CustomOCR):
+        def supported_extensions(self) -> set[str]:
+            nonlocal calls
+            calls += 1
+            return super().supported_extensions()
+
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    ocr = CountingOCR(lambda p: p.read_text(), extensions={".txt"})
+    kb = Athenaeum(embeddings=fake_embeddings, config=config, ocr_provider=ocr)
+    for _ in range(2):
+        with pytest.raises(ValueError, match=r"Unsupported file type: \.md"):
+            kb.load_doc(str(sample_md_path))
+    assert calls == 1
+
+
+def test_load_doc_propagates_embedding_error(tmp_path: Path, sample_md_path: Path) -> None:
+    class FailingEmbeddings(FakeEmbeddings):
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            raise RuntimeError("embedding backend unavailable")
+
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    kb = Athenaeum(embeddings=FailingEmbeddings(), config=config)
+    with pytest.raises(RuntimeError, match="embedding backend unavailable"):
+        kb.load_doc(str(sample_md_path))
+    # The half-loaded document is rolled back everywhere
+    assert kb.list_docs() == []
+    assert kb._bm25.doc_ids == set()
+    assert list((tmp_path / "kb" / "docs").iterdir()) == []
+
+
+def test_load_doc_failure_removes_embedded_chunks(
+    tmp_path: Path,
+    sample_md_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_embeddings: FakeEmbeddings,
+) -> None:
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    with Athenaeum(embeddings=fake_embeddings, config=config) as kb:
+
+        def failing_add(doc: object) -> None:
+            raise OSError("registry not writable")
+
+        monkeypatch.setattr(kb._doc_store, "add", failing_add)
+        with pytest.raises(OSError, match="registry not writable"):
+            kb.load_doc(str(sample_md_path))
+        assert kb._vector._store._collection.count() == 0
+        assert kb._bm25.doc_ids == set()
+        assert list((tmp_path / "kb" / "docs").iterdir()) == []
+
+
+def test_context_manager_closes_worker_threads(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    with Athenaeum(embeddings=fake_embeddings, config=config) as kb:
+        kb.load_doc(str(sample_md_path))
+        assert kb.search_kb("introduction", strategy="hybrid")
+    with pytest.raises(RuntimeError):
+        kb._executor.submit(print)
+    kb.close()  # idempotent
+
+
 def test_list_docs(athenaeum: Athenaeum, sample_md_path: Path) -> None:
     athenaeum.load_doc(str(sample_md_path))
     docs = athenaeum.list_docs()
@@ -83,6 +135,20 @@ def test_search_kb_names(athenaeum: Athenaeum, sample_md_path: Path) -> None:
     assert results[0].name == "sample.md"
 
 
+def test_search_kb_names_exact_ranks_first(
+    athenaeum: Athenaeum, sample_md_path: Path, sample_txt_path: Path
+) -> None:
+    athenaeum.load_doc(str(sample_txt_path))
+    results = athenaeum.search_kb("SAMPLE.MD", scope="names")
+    assert results == []  # name table built before the next load
+    athenaeum.load_doc(str(sample_md_path))
+    results = athenaeum.search_kb("SAMPLE.MD", scope="names")
+    assert [(r.name, r.score) for r in results] == [("sample.md", 1.0)]
+    results = athenaeum.search_kb("sample", scope="names")
+    assert [r.name for r in results] == ["sample.txt", "sample.md"]
+    assert all(r.score == 0.5 for r in results)
+
+
 def test_search_kb_names_no_match(athenaeum: Athenaeum, sample_md_path: Path) -> None:
     athenaeum.load_doc(str(sample_md_path))
     results = athenaeum.search_kb("nonexistent", scope="names")
@@ -110,6 +176,18 @@ def test_read_doc(athenaeum: Athenaeum, sample_md_path: Path) -> None:
     assert excerpt.total_lines > 0
 
 
+def test_read_doc_matches_full_split(athenaeum: Athenaeum, sample_md_path: Path) -> None:
+    doc_id = athenaeum.load_doc(str(sample_md_path))
+    doc = athenaeum._doc_store.get(doc_id)
+    assert doc is not None
+    lines = Path(doc.path_to_md).read_text().split("\n")
+    for start, end in [(1, 1), (3, 7), (2, len(lines)), (4, len(lines) + 50)]:
+        excerpt = athenaeum.read_doc(doc_id, start_line=start, end_line=end)
+        assert excerpt.text == "\n".join(lines[start - 1 : end])
+        assert excerpt.line_range == (start, min(end, len(lines)))
+        assert excerpt.total_lines == len(lines)
+
+
 def test_read_doc_not_found(athenaeum: Athenaeum) -> None:
     with pytest.raises(ValueError, match="Document not found"):
         athenaeum.read_doc("fake-id")
@@ -161,6 +239,25 @@ def test_list_tags(
     assert athenaeum.list_tags() == {"alpha", "beta", "gamma"}
 
 
+def test_list_tags_after_untag(athenaeum: Athenaeum, sample_md_path: Path) -> None:
+    doc_id = athenaeum.load_doc(str(sample_md_path), tags={"alpha", "beta"})
+    athenaeum.untag_doc(doc_id, {"alpha"})
+    assert athenaeum.list_tags() == {"beta"}
+    assert athenaeum.list_docs(tags={"alpha"}) == []
+    assert [d.id for d in athenaeum.list_docs(tags={"beta"})] == [doc_id]
+
+
+def test_tag_filter_survives_reload(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
+    doc_id = kb.load_doc(str(sample_md_path), tags={"report"})
+    reopened = Athenaeum(embeddings=fake_embeddings, config=config)
+    assert reopened.list_tags() == {"report"}
+    assert [d.id for d in reopened.list_docs(tags={"report"})] == [doc_id]
+
+
 def test_list_docs_filter_by_tags(
     athenaeum: Athenaeum, sample_md_path: Path, sample_txt_path: Path
 ) -> None:
@@ -229,19 +326,23 @@ def test_get_tags_empty(athenaeum: Athenaeum, sample_md_path: Path) -> None:
 # --- similarity_threshold tests ---
 
 
-def test_similarity_threshold_filters_all(tmp_path: Path, sample_md_path: Path) -> None:
+def test_similarity_threshold_filters_all(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
     from athenaeum.chunker import make_splitter
     config = AthenaeumConfig(
         storage_dir=tmp_path / "athenaeum",
         similarity_threshold=1.0,
     )
-    kb = Athenaeum(embeddings=FakeEmbeddings(), config=config, text_splitter=make_splitter(chunk_size=200, chunk_overlap=50))
+    kb = Athenaeum(embeddings=fake_embeddings, config=config, text_splitter=make_splitter(chunk_size=200, chunk_overlap=50))
     kb.load_doc(str(sample_md_path))
     results = kb.search_kb("search strategies", strategy="vector")
     assert results == []
 
 
-def test_similarity_threshold_zero_passes_all(tmp_path: Path, sample_md_path: Path) -> None:
+def test_similarity_threshold_zero_passes_all(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
     from athenaeum.chunker import make_splitter
     splitter = make_splitter(chunk_size=200, chunk_overlap=50)
     config_thresh = AthenaeumConfig(
@@ -252,8 +353,8 @@ def test_similarity_threshold_zero_passes_all(tmp_path: Path, sample_md_path: Pa
         storage_dir=tmp_path / "none",
         similarity_threshold=None,
     )
-    kb_thresh = Athenaeum(embeddings=FakeEmbeddings(), config=config_thresh, text_splitter=splitter)
-    kb_none = Athenaeum(embeddings=FakeEmbeddings(), config=config_none, text_splitter=splitter)
+    kb_thresh = Athenaeum(embeddings=fake_embeddings, config=config_thresh, text_splitter=splitter)
+    kb_none = Athenaeum(embeddings=fake_embeddings, config=config_none, text_splitter=splitter)
     kb_thresh.load_doc(str(sample_md_path))
     kb_none.load_doc(str(sample_md_path))
     results_thresh = kb_thresh.search_kb("search", strategy="vector")
@@ -261,6 +362,23 @@ def test_similarity_threshold_zero_passes_all(tmp_path: Path, sample_md_path: Pa
     assert len(results_thresh) == len(results_none)
 
 
+def test_search_kb_missing_doc_does_not_use_up_top_k(
+    athenaeum: Athenaeum, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    doc_ids = []
+    for i, text in enumerate(["apple apple apple", "apple pie", "apple tart"]):
+        path = tmp_path / f"doc{i}.md"
+        path.write_text(text)
+        doc_ids.append(athenaeum.load_doc(str(path)))
+    best = doc_ids[0]
+    store_get = athenaeum._doc_store.get
+    monkeypatch.setattr(
+        athenaeum._doc_store, "get", lambda doc_id: None if doc_id == best else store_get(doc_id)
+    )
+    results = athenaeum.search_kb("apple", strategy="bm25", top_k=2)
+    assert {r.id for r in results} == set(doc_ids[1:])
+
+
 # --- aggregate=False tests ---
 
 
@@ -311,13 +429,31 @@ def test_search_kb_aggregate_true_default(
     assert all(isinstance(r, SearchHit) for r in results)
 
 
+def test_search_kb_aggregate_takes_best_chunk_per_doc(
+    athenaeum: Athenaeum, sample_md_path: Path, sample_txt_path: Path
+) -> None:
+    athenaeum.load_doc(str(sample_md_path))
+    athenaeum.load_doc(str(sample_txt_path))
+    chunks = athenaeum.search_kb("search", strategy="bm25", top_k=30, aggregate=False)
+    best: dict[str, ContentSearchHit] = {}
+    for hit in chunks:
+        best.setdefault(hit.doc_id, hit)
+
+    results = athenaeum.search_kb("search", strategy="bm25", top_k=10)
+    assert [r.id for r in results] == list(best)
+    for r in results:
+        assert r.score == pytest.approx(best[r.id].score)
+        assert r.snippet == best[r.id].text[:200]
+
 # --- per-call chunk params & auto_chunk tests ---
 
 
-def test_load_doc_per_call_chunk_size(tmp_path: Path, sample_md_path: Path) -> None:
+def test_load_doc_per_call_chunk_size(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
     """load_doc with explicit chunk_size/chunk_overlap overrides instance splitter."""
     config = AthenaeumConfig(storage_dir=tmp_path / "kb")
-    kb = Athenaeum(embeddings=FakeEmbeddings(), config=config)
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
     # Should not raise; per-call params create a fresh splitter
     doc_id = kb.load_doc(str(sample_md_path), chunk_size=300, chunk_overlap=30)
     assert isinstance(doc_id, str)
@@ -325,28 +461,179 @@ def test_load_doc_per_call_chunk_size(tmp_path: Path, sample_md_path: Path) -> N
     assert len(results) > 0
 
 
-def test_load_doc_per_call_separators(tmp_path: Path, sample_md_path: Path) -> None:
+def test_load_doc_per_call_separators(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
     """load_doc with explicit separators overrides markdown defaults."""
     config = AthenaeumConfig(storage_dir=tmp_path / "kb")
-    kb = Athenaeum(embeddings=FakeEmbeddings(), config=config)
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
     doc_id = kb.load_doc(str(sample_md_path), chunk_size=400, chunk_overlap=50, separators=["\n\n", "\n", " "])
     assert isinstance(doc_id, str)
 
 
-def test_auto_chunk_enabled(tmp_path: Path, sample_md_path: Path) -> None:
+def test_auto_chunk_enabled(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
     """auto_chunk=True picks chunk sizes automatically; documents load without error."""
     config = AthenaeumConfig(storage_dir=tmp_path / "kb", auto_chunk=True)
-    kb = Athenaeum(embeddings=FakeEmbeddings(), config=config)
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
     doc_id = kb.load_doc(str(sample_md_path))
     assert isinstance(doc_id, str)
     results = kb.search_kb("search", strategy="bm25")
     assert len(results) > 0
 
 
-def test_per_call_overrides_auto_chunk(tmp_path: Path, sample_md_path: Path) -> None:
+def test_per_call_overrides_auto_chunk(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
     """Per-call chunk_size/chunk_overlap takes priority over auto_chunk."""
     config = AthenaeumConfig(storage_dir=tmp_path / "kb", auto_chunk=True)
-    kb = Athenaeum(embeddings=FakeEmbeddings(), config=config)
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
     # Explicit params should be accepted even when auto_chunk is enabled
     doc_id = kb.load_doc(str(sample_md_path), chunk_size=500, chunk_overlap=50)
     assert isinstance(doc_id, str)
+
+
+# --- persistence tests ---
+
+
+def test_bm25_index_persisted_across_instances(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
+    doc_id = kb.load_doc(str(sample_md_path))
+    assert (tmp_path / "kb" / "index" / "bm25").exists()
+
+    reopened = Athenaeum(embeddings=fake_embeddings, config=config)
+    results = reopened.search_doc(doc_id, "BM25 keyword search", strategy="bm25")
+    assert len(results) > 0
+
+
+def test_bm25_scores_loaded_on_reopen_without_rebuild(
+    tmp_path: Path,
+    sample_md_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_embeddings: FakeEmbeddings,
+) -> None:
+    from athenaeum.search.bm25 import BM25Index
+
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    with Athenaeum(embeddings=fake_embeddings, config=config) as kb:
+        doc_id = kb.load_doc(str(sample_md_path))  # close() builds and persists the scores
+
+    def fail(self: BM25Index) -> None:
+        raise AssertionError("BM25 index was rebuilt")
+
+    monkeypatch.setattr(BM25Index, "_rebuild", fail)
+    with Athenaeum(embeddings=fake_embeddings, config=config) as reopened:
+        assert reopened._bm25._retriever is not None
+        results = reopened.search_doc(doc_id, "BM25 keyword search", strategy="bm25")
+        assert results and results[0].score > 0
+
+
+def test_bm25_index_rebuilt_when_stale(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
+    import shutil
+
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
+    doc_id = kb.load_doc(str(sample_md_path))
+    shutil.rmtree(tmp_path / "kb" / "index" / "bm25")
+
+    reopened = Athenaeum(embeddings=fake_embeddings, config=config)
+    results = reopened.search_doc(doc_id, "BM25 keyword search", strategy="bm25")
+    assert len(results) > 0
+
+
+def test_bm25_stale_index_reindexes_only_missing_docs(
+    tmp_path: Path, sample_md_path: Path, sample_txt_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
+    import shutil
+
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    bm25_dir = tmp_path / "kb" / "index" / "bm25"
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
+    md_id = kb.load_doc(str(sample_md_path), chunk_size=120, chunk_overlap=0)
+    md_chunks = kb.search_doc(md_id, "search", top_k=100, strategy="bm25")
+    shutil.copytree(bm25_dir, tmp_path / "bm25-before-txt")
+    txt_id = kb.load_doc(str(sample_txt_path))
+    shutil.rmtree(bm25_dir)
+    shutil.copytree(tmp_path / "bm25-before-txt", bm25_dir)
+
+    reopened = Athenaeum(embeddings=fake_embeddings, config=config)
+    assert reopened._bm25.doc_ids == {md_id, txt_id}
+    # Per-call chunk params of the already-indexed doc survive: its chunks aren't rebuilt
+    reopened_md = reopened.search_doc(md_id, "search", top_k=100, strategy="bm25")
+    assert sorted(h.line_range for h in reopened_md) == sorted(h.line_range for h in md_chunks)
+
+
+def test_bm25_index_untouched_on_reopen_with_empty_doc(
+    tmp_path: Path, sample_md_path: Path, fake_embeddings: FakeEmbeddings
+) -> None:
+    empty = tmp_path / "empty.md"
+    empty.write_text("")
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    bm25_dir = tmp_path / "kb" / "index" / "bm25"
+    with Athenaeum(embeddings=fake_embeddings, config=config) as kb:
+        md_id = kb.load_doc(str(sample_md_path))
+        empty_id = kb.load_doc(str(empty))
+    before = {p.name: p.stat().st_mtime_ns for p in bm25_dir.iterdir()}
+
+    with Athenaeum(embeddings=fake_embeddings, config=config) as reopened:
+        # The chunkless doc counts as indexed, so nothing is re-chunked or rewritten
+        assert reopened._bm25.doc_ids == {md_id, empty_id}
+        assert {p.name: p.stat().st_mtime_ns for p in bm25_dir.iterdir()} == before
+
+
+def test_bm25_reindex_in_process_pool(
+    tmp_path: Path,
+    sample_md_path: Path,
+    sample_txt_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_embeddings: FakeEmbeddings,
+) -> None:
+    import shutil
+
+    import athenaeum.athenaeum as athenaeum_module
+
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
+    md_id = kb.load_doc(str(sample_md_path))
+    txt_id = kb.load_doc(str(sample_txt_path))
+    expected = kb.search_kb("search", strategy="bm25", aggregate=False)
+    shutil.rmtree(tmp_path / "kb" / "index" / "bm25")
+
+    monkeypatch.setattr(athenaeum_module, "_PARALLEL_REINDEX_MIN_DOCS", 2)
+    reopened = Athenaeum(embeddings=fake_embeddings, config=config)
+    assert reopened._bm25.doc_ids == {md_id, txt_id}
+    assert reopened.search_kb("search", strategy="bm25", aggregate=False) == expected
+
+
+def test_bm25_reindex_falls_back_when_pool_cannot_start(
+    tmp_path: Path,
+    sample_md_path: Path,
+    sample_txt_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    fake_embeddings: FakeEmbeddings,
+) -> None:
+    import shutil
+
+    import athenaeum.athenaeum as athenaeum_module
+
+    config = AthenaeumConfig(storage_dir=tmp_path / "kb")
+    kb = Athenaeum(embeddings=fake_embeddings, config=config)
+    md_id = kb.load_doc(str(sample_md_path))
+    txt_id = kb.load_doc(str(sample_txt_path))
+    expected = kb.search_kb("search", strategy="bm25", aggregate=False)
+    shutil.rmtree(tmp_path / "kb" / "index" / "bm25")
+
+    def no_pool(*args: object, **kwargs: object) -> None:
+        raise PermissionError("semaphores unavailable")
+
+    monkeypatch.setattr(athenaeum_module, "_PARALLEL_REINDEX_MIN_DOCS", 2)
+    monkeypatch.setattr(athenaeum_module, "ProcessPoolExecutor", no_pool)
+    reopened = Athenaeum(embeddings=fake_embeddings, config=config)
+    assert reopened._bm25.doc_ids == {md_id, txt_id}
+    assert reopened.search_kb("search", strategy="bm25", aggregate=False) == expected
@@ -1,23 +1,27 @@
 """Tests for BM25 search index."""
 
+from pathlib import Path
+
+import bm25s
+import pytest
+
 from athenaeum.models import ChunkMetadata
-from athenaeum.search.bm25 import BM25Index
+from athenaeum.search.bm25 import _STEMMER, BM25Index
+
+# (doc_id, chunk_index, start_line, end_line, text)
+_CHUNK_SPECS = (
+    ("d1", 0, 1, 10, "python programming language tutorial"),
+    ("d1", 1, 11, 20, "java programming enterprise applications"),
+    ("d2", 0, 1, 10, "python data science machine learning"),
+)
 
 
 def _make_chunks() -> list[ChunkMetadata]:
     return [
-        ChunkMetadata(
-            doc_id="d1", chunk_index=0, start_line=1, end_line=10,
-            text="python programming language tutorial",
-        ),
-        ChunkMetadata(
-            doc_id="d1", chunk_index=1, start_line=11, end_line=20,
-            text="java programming enterprise applications",
-        ),
-        ChunkMetadata(
-            doc_id="d2", chunk_index=0, start_line=1, end_line=10,
-            text="python data science machine learning",
-        ),
+        ChunkMetadata.model_construct(
+            doc_id=doc_id, chunk_index=index, start_line=start, end_line=end, text=text
+        )
+        for doc_id, index, start, end, text in _CHUNK_SPECS
     ]
 
 
@@ -57,3 +61,177 @@ def test_bm25_top_k() -> None:
     idx.add_chunks(_make_chunks())
     results = idx.search("python", top_k=1)
     assert len(results) == 1
+
+
+def test_bm25_filter_by_doc_ids() -> None:
+    idx = BM25Index()
+    idx.add_chunks(_make_chunks())
+    results = idx.search("programming", doc_ids={"d2"})
+    assert len(results) == 1
+    assert results[0][0].doc_id == "d2"
+
+
+def test_bm25_filtered_scores_match_full_scoring(tmp_path: Path) -> None:
+    idx = BM25Index()
+    idx.add_chunks(_make_chunks())
+    extra = ChunkMetadata(doc_id="d1", chunk_index=9, text="more python", start_line=9, end_line=9)
+    idx.add_chunks([extra])
+    full = {(c.doc_id, c.chunk_index): s for c, s in idx.search("python programming")}
+    idx.save(tmp_path / "bm25")
+    loaded = BM25Index.load(tmp_path / "bm25")
+    for index in (idx, loaded):
+        results = index.search("python programming", doc_ids={"d1"})
+        assert [c.doc_id for c, _ in results] == ["d1"] * 3
+        assert all(s == full[(c.doc_id, c.chunk_index)] for c, s in results)
+    assert idx.search("python", doc_id="d1", doc_ids={"d2"}) == []
+
+
+def test_bm25_add_pretokenized_chunks() -> None:
+    chunks = _make_chunks()
+    idx = BM25Index()
+    idx.add_chunks(chunks)
+    pre = BM25Index()
+    pre.add_chunks(chunks, token_lists=BM25Index.tokenize_chunks(chunks))
+    assert pre.search("python programming") == idx.search("python programming")
+
+
+def test_bm25_stemmed_match() -> None:
+    idx = BM25Index()
+    idx.add_chunks(_make_chunks())
+    results = idx.search("programs", top_k=1)
+    assert "programming" in results[0][0].text
+    assert results[0][1] > 0
+
+
+def test_bm25_save_load_roundtrip(tmp_path: Path) -> None:
+    idx = BM25Index()
+    idx.add_chunks(_make_chunks())
+    idx.save(tmp_path / "bm25")
+    loaded = BM25Index.load(tmp_path / "bm25")
+    assert loaded.size == 3
+    assert loaded.doc_ids == {"d1", "d2"}
+    expected = [(c.text, s) for c, s in idx.search("python programming")]
+    assert [(c.text, s) for c, s in loaded.search("python programming")] == expected
+
+
+def test_bm25_add_after_load(tmp_path: Path) -> None:
+    idx = BM25Index()
+    idx.add_chunks(_make_chunks()[:2])
+    idx.save(tmp_path / "bm25")
+    loaded = BM25Index.load(tmp_path / "bm25")
+    loaded.add_chunks(_make_chunks()[2:])
+    loaded.save(tmp_path / "bm25")
+    results = BM25Index.load(tmp_path / "bm25").search("science", top_k=1)
+    assert results[0][0].doc_id == "d2"
+
+
+def test_bm25_save_appends_to_its_own_copy(tmp_path: Path) -> None:
+    path = tmp_path / "bm25"
+    idx = BM25Index()
+    idx.add_chunks(_make_chunks()[:2])
+    idx.save(path)
+    chunks_file = path / "chunks.jsonl"
+    before, inode = chunks_file.read_text(), chunks_file.stat().st_ino
+
+    idx.add_chunks(_make_chunks()[2:])
+    idx.save(path)
+    assert chunks_file.stat().st_ino == inode
+    assert chunks_file.read_text().startswith(before)
+    loaded = BM25Index.load(path)
+    assert loaded.size == 3
+    expected = [(c.text, s) for c, s in idx.search("python programming")]
+    assert [(c.text, s) for c, s in loaded.search("python programming")] == expected
+
+    # Removals can't be appended: the whole copy is rewritten
+    idx.remove_document("d2")
+    idx.save(path)
+    assert chunks_file.stat().st_ino != inode
+    assert BM25Index.load(path).doc_ids == {"d1"}
+
+
+def test_bm25_records_docs_without_chunks(tmp_path: Path) -> None:
+    idx = BM25Index()
+    idx.add_chunks(_make_chunks())
+    idx.save(tmp_path / "bm25")
+    idx.add_chunks([], doc_ids=["empty"])
+    idx.save(tmp_path / "bm25")
+    loaded = BM25Index.load(tmp_path / "bm25")
+    assert loaded.doc_ids == {"d1", "d2", "empty"}
+    assert loaded.size == 3
+    loaded.remove_document("empty")
+    assert loaded.doc_ids == {"d1", "d2"}
+
+
+def test_bm25_load_reuses_persisted_tokens(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    idx = BM25Index()
+    idx.add_chunks(_make_chunks())
+    idx.save(tmp_path / "bm25")
+    loaded = BM25Index.load(tmp_path / "bm25")
+
+    tokenized: list[str] = []
+    original = BM25Index._tokenize
+
+    def counting(texts: list[str]) -> list[list[str]]:
+        tokenized.extend(texts)
+        return original(texts)
+
+    monkeypatch.setattr(BM25Index, "_tokenize", staticmethod(counting))
+    loaded.remove_document("d1")
+    assert tokenized == []
+    assert loaded.search("science")[0][0].doc_id == "d2"
+
+
+def test_bm25_rebuilds_lazily(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    builds = 0
+    original = BM25Index._rebuild
+
+    def counting(self: BM25Index) -> None:
+        nonlocal builds
+        builds += 1
+        original(self)
+
+    monkeypatch.setattr(BM25Index, "_rebuild", counting)
+    idx = BM25Index()
+    for chunk in _make_chunks():
+        idx.add_chunks([chunk])
+    idx.remove_document("missing")
+    assert builds == 0
+    assert idx.search("science")[0][0].doc_id == "d2"
+    idx.search("python")
+    assert builds == 1
+
+    idx.remove_document("d2")
+    idx.save(tmp_path / "bm25")  # dirty: saved without score matrices
+    loaded = BM25Index.load(tmp_path / "bm25")
+    assert [c.doc_id for c, _ in loaded.search("programming")] == ["d1", "d1"]
+    assert builds == 2
+
+
+def test_bm25_persists_scores_after_lazy_rebuild(tmp_path: Path) -> None:
+    path = tmp_path / "bm25"
+    idx = BM25Index()
+    idx.add_chunks(_make_chunks())
+    idx.save(path)
+    assert not (path / "params.index.json").exists()
+
+    expected = [(c.text, s) for c, s in idx.search("python programming")]
+    assert (path / "params.index.json").exists()
+    loaded = BM25Index.load(path)
+    assert loaded._retriever is not None
+    assert not loaded._dirty
+    assert [(c.text, s) for c, s in loaded.search("python programming")] == expected
+
+
+def test_bm25_tokenize_matches_bm25s() -> None:
+    texts = [
+        "The quick brown foxes were running over the lazy dogs!",
+        "Café résumé naïve — Übermäßige Größe, straße_name x2 a",
+        "",
+        "Searching searched searches: the SEARCH_ENGINE indexes 42 documents.",
+    ]
+    expected = bm25s.tokenize(
+        texts, stopwords="en", stemmer=_STEMMER, return_ids=False, show_progress=False
+    )
+    assert BM25Index._tokenize(texts) == expected
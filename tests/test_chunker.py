@@ -2,12 +2,23 @@
 
 from __future__ import annotations
 
+import random
 import re
 
 import pytest
 from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
 
-from athenaeum.chunker import TextSplitter, auto_chunk_splitter, chunk_markdown, make_splitter
+from athenaeum.chunker import (
+    TextSplitter,
+    auto_chunk_splitter,
+    chunk_markdown,
+    chunk_markdown_structured,
+    make_splitter,
+)
+from athenaeum.models import TOCEntry
+from athenaeum.toc import extract_toc
+
+_HEADING_RE_MULTI = re.compile(r"^#{1,6} ", re.MULTILINE)
 
 
 def _small_splitter(chunk_size: int = 200, chunk_overlap: int = 50) -> TextSplitter:
@@ -15,6 +26,30 @@ def _small_splitter(chunk_size: int = 200, chunk_overlap: int = 50) -> TextSplit
     return make_splitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
 
 
+def _random_markdown(rng: random.Random) -> str:
+    """Helper: short markdown of headings, blank lines and repeated words."""
+    parts = []
+    for i in range(rng.randint(3, 40)):
+        r = rng.random()
+        if r < 0.2:
+            parts.append(f"\n{'#' * rng.randint(1, 3)} H{i}\n")
+        elif r < 0.35:
+            parts.append("\n\n")
+        else:
+            parts.append(f"w{rng.randint(1, 8)} ")
+    return "".join(parts)
+
+
+class _ListSplitter:
+    """Helper: splitter returning fixed chunk texts, whatever the input."""
+
+    def __init__(self, texts: list[str]) -> None:
+        self.texts = texts
+
+    def split_text(self, text: str) -> list[str]:
+        return self.texts
+
+
 def test_chunk_basic(sample_md_text: str) -> None:
     chunks = chunk_markdown(sample_md_text, doc_id="test-1", text_splitter=_small_splitter())
     assert len(chunks) > 1
@@ -52,6 +87,84 @@ def test_line_numbers_accurate(sample_md_text: str) -> None:
         assert chunk.end_line >= chunk.start_line
 
 
+def test_end_line_accurate(sample_md_text: str, sample_md_lines: list[str]) -> None:
+    chunks = chunk_markdown(sample_md_text, doc_id="d", text_splitter=_small_splitter())
+    for chunk in chunks:
+        assert chunk.end_line == chunk.start_line + chunk.text.count("\n")
+        assert sample_md_lines[chunk.end_line - 1] in chunk.text
+
+
+def test_end_line_matches_chunk_text_on_generated_markdown() -> None:
+    rng = random.Random(0)
+    for _ in range(1000):
+        text = _random_markdown(rng)
+        size = rng.randint(10, 60)
+        splitter = make_splitter(size, rng.randint(0, size // 2))
+        for chunk in chunk_markdown(text, doc_id="d", text_splitter=splitter):
+            assert chunk.end_line == chunk.start_line + chunk.text.count("\n")
+
+
+def test_chunk_starting_at_previous_start() -> None:
+    # The splitter emits a chunk and then a longer one from the same offset
+    text = "\n\n### H1\nw1\n### H3\nw5 w4\n## H6\nw4 w7"
+    splitter = _ListSplitter(["### H1\nw1", "### H1\nw1\n### H3\nw5 w4"])
+    chunks = chunk_markdown(text, doc_id="d", text_splitter=splitter)
+    assert [(c.start_line, c.end_line) for c in chunks] == [(3, 4), (3, 6)]
+
+
+def test_unlocated_chunk_lines_come_from_its_text() -> None:
+    # The second chunk only occurs before the first: it can't be located
+    splitter = _ListSplitter(["b\nc", "a\nb"])
+    chunks = chunk_markdown("a\nb\nc", doc_id="d", text_splitter=splitter)
+    assert [(c.start_line, c.end_line) for c in chunks] == [(2, 3), (2, 3)]
+
+
+def test_zero_overlap_repeated_text_lines() -> None:
+    # Self-overlapping repeats: the second chunk must not be located inside the first.
+    chunks = chunk_markdown(
+        "x\nx\nx\nx", doc_id="d", text_splitter=make_splitter(3, 0, separators=["\n"])
+    )
+    assert [(c.text, c.start_line, c.end_line) for c in chunks] == [
+        ("x\nx", 1, 2),
+        ("x", 3, 3),
+        ("x", 4, 4),
+    ]
+
+
+def test_overlap_short_chunk_not_matched_inside_previous() -> None:
+    # "hb" also occurs inside the first chunk, before the earliest possible start.
+    chunks = chunk_markdown(
+        "aaaa hb c\nhb\nzzzzzzzzz", doc_id="d", text_splitter=make_splitter(10, 3, ["\n"])
+    )
+    assert [(c.text, c.start_line) for c in chunks][:2] == [("aaaa hb c", 1), ("hb", 2)]
+
+
+def test_chunk_offsets_consistent_on_repeated_text() -> None:
+    # Found by fuzzing: the second chunk starts where the first one does
+    same_start = (
+        "\n\n\n### H1\nw1 \n### H3\nw5 w4 \n## H6\nw4 w7 w1 w3 w6 w2 w8 w1 w7 \n### H16\n\n\n"
+        "w4 w3 \n# H20\nw6 \n### H22\n\n## H23\n\n\n"
+    )
+    cases: list[tuple[str, TextSplitter]] = [(same_start, make_splitter(59, 28))]
+    rng = random.Random(0)
+    for _ in range(300):
+        text = "".join(
+            rng.choice(["ab", "ba", "a", "b", "aba"]) + rng.choice([" ", " ", "\n"])
+            for _ in range(rng.randint(5, 60))
+        ).strip()
+        size = rng.randint(4, 20)
+        splitter = make_splitter(size, rng.randint(0, size - 1), separators=["\n", " "])
+        cases.append((text, splitter))
+    for text, splitter in cases:
+        previous = -1
+        for chunk in chunk_markdown(text, doc_id="d", text_splitter=splitter):
+            assert chunk.start_char is not None
+            assert chunk.start_char >= previous
+            assert text[chunk.start_char : chunk.end_char] == chunk.text
+            assert chunk.start_line == text.count("\n", 0, chunk.start_char) + 1
+            previous = chunk.start_char
+
+
 def test_heading_aware() -> None:
     text = (
         "# Title\n\nOpening paragraph with enough text to fill a chunk boundary.\n\n"
@@ -60,10 +173,9 @@ def test_heading_aware() -> None:
         "Additional section text to ensure we have enough characters.\n"
     )
     chunks = chunk_markdown(text, doc_id="d", text_splitter=make_splitter(chunk_size=300, chunk_overlap=50))
-    heading_re = re.compile(r"^#{1,6} ", re.MULTILINE)
     # At least one chunk (after the first) should start with or contain a heading
     texts = [c.text for c in chunks]
-    assert any(heading_re.search(t) for t in texts)
+    assert any(_HEADING_RE_MULTI.search(t) for t in texts)
 
 
 def test_custom_text_splitter() -> None:
@@ -96,6 +208,13 @@ def test_make_splitter_custom_separators() -> None:
     assert len(chunks) >= 1
 
 
+def test_make_splitter_cached() -> None:
+    assert make_splitter() is make_splitter()
+    custom = make_splitter(chunk_size=50, chunk_overlap=5, separators=["\n", " "])
+    assert make_splitter(50, 5, ["\n", " "]) is custom
+    assert make_splitter(50, 5, [" ", "\n"]) is not custom
+    assert auto_chunk_splitter("short") is auto_chunk_splitter("tiny")
+
 # --- auto_chunk_splitter tests ---
 
 
@@ -122,3 +241,69 @@ def test_auto_chunk_large_doc() -> None:
     # Verify chunk sizes are reasonable for large-doc settings (chunk_size=3000)
     for chunk in chunks:
         assert len(chunk) <= 3500  # allow small LangChain overrun tolerance
+
+
+# --- chunk_markdown_structured tests ---
+
+
+def test_structured_packs_sections_on_heading_boundaries(
+    sample_md_text: str, parsed_toc: list[TOCEntry], sample_md_lines: list[str]
+) -> None:
+    chunks = chunk_markdown_structured(sample_md_text, "d", parsed_toc, _small_splitter())
+    heading_lines = {e.start_line for e in parsed_toc}
+    assert [c.chunk_index for c in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert chunk.text == "\n".join(sample_md_lines[chunk.start_line - 1 : chunk.end_line])
+        assert chunk.start_line in heading_lines or chunk.start_line == 1
+        assert len(chunk.text) <= 200
+
+
+def test_chunk_char_offsets(sample_md_text: str, parsed_toc: list[TOCEntry]) -> None:
+    cases = [(sample_md_text, parsed_toc, _small_splitter())]
+    rng = random.Random(0)
+    for _ in range(500):
+        text = _random_markdown(rng)
+        size = rng.randint(10, 60)
+        cases.append((text, extract_toc(text), make_splitter(size, rng.randint(0, size // 2))))
+    for text, toc, splitter in cases:
+        for chunks in (
+            chunk_markdown(text, "d", splitter),
+            chunk_markdown_structured(text, "d", toc, splitter),
+        ):
+            for chunk in chunks:
+                assert chunk.start_char is not None
+                assert text[chunk.start_char : chunk.end_char] == chunk.text
+
+
+def test_unlocated_chunk_has_no_char_offsets() -> None:
+    chunks = chunk_markdown("a\nb\nc", doc_id="d", text_splitter=_ListSplitter(["b\nc", "a\nb"]))
+    assert [(c.start_char, c.end_char) for c in chunks] == [(2, 5), (None, None)]
+
+
+def test_structured_splits_oversized_sections() -> None:
+    body = "\n\n".join(f"Paragraph {i} " + "word " * 20 for i in range(10))
+    text = f"# Small\n\nshort intro\n\n# Big\n\n{body}\n\n# Tail\n\nthe end"
+    chunks = chunk_markdown_structured(text, "d", extract_toc(text), _small_splitter())
+    lines = text.split("\n")
+    assert chunks[0].text == "# Small\n\nshort intro"
+    assert len(chunks) > 3
+    for chunk in chunks:
+        expected = "\n".join(lines[chunk.start_line - 1 : chunk.end_line])
+        assert chunk.text in expected
+        assert expected.startswith(chunk.text.split("\n")[0])
+    assert chunks[-1].text == "# Tail\n\nthe end"
+
+
+def test_structured_falls_back_without_char_chunk_size(
+    sample_md_text: str, parsed_toc: list[TOCEntry]
+) -> None:
+    class PlainSplitter:
+        def split_text(self, text: str) -> list[str]:
+            return [text]
+
+    plain = PlainSplitter()
+    expected = chunk_markdown(sample_md_text, "d", plain)
+    assert chunk_markdown_structured(sample_md_text, "d", parsed_toc, plain) == expected
+    small = _small_splitter()
+    expected = chunk_markdown(sample_md_text, "d", small)
+    assert chunk_markdown_structured(sample_md_text, "d", [], small) == expected
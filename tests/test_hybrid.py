@@ -1,7 +1,9 @@
 """Tests for reciprocal rank fusion."""
 
+import numpy as np
+
 from athenaeum.models import ChunkMetadata
-from athenaeum.search.hybrid import reciprocal_rank_fusion
+from athenaeum.search.hybrid import reciprocal_rank_fusion, top_k_indices
 
 
 def _chunk(doc_id: str, idx: int) -> ChunkMetadata:
@@ -36,3 +38,18 @@ def test_rrf_top_k() -> None:
 def test_rrf_empty() -> None:
     assert reciprocal_rank_fusion([], top_k=10) == []
     assert reciprocal_rank_fusion([[]], top_k=10) == []
+
+
+def test_rrf_ties_keep_first_seen_order() -> None:
+    list1 = [(_chunk("d1", i), 1.0) for i in range(4)]
+    list2 = [(_chunk("d2", i), 1.0) for i in range(4)]
+    results = reciprocal_rank_fusion([list1, list2], k=60, top_k=3)
+    assert [(c.doc_id, c.chunk_index) for c, _ in results] == [("d1", 0), ("d2", 0), ("d1", 1)]
+    assert results[0][1] == results[1][1] == 1.0 / 61
+
+
+def test_top_k_indices_matches_stable_sort() -> None:
+    scores = np.array([0.5, 0.9, 0.5, 0.1, 0.9, 0.5])
+    expected = sorted(range(len(scores)), key=lambda i: -scores[i])
+    for top_k in range(len(scores) + 2):
+        assert top_k_indices(scores, top_k).tolist() == expected[:top_k]
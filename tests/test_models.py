@@ -1,5 +1,9 @@
 """Tests for Athenaeum data models."""
 
+from datetime import UTC, datetime
+from pathlib import Path
+
+from athenaeum.document_store import DocumentStore
 from athenaeum.models import (
     ChunkMetadata,
     ContentSearchHit,
@@ -9,6 +13,7 @@ from athenaeum.models import (
     SearchHit,
     TOCEntry,
 )
+from athenaeum.storage import StorageManager
 
 
 def test_metadata_creation() -> None:
@@ -70,3 +75,129 @@ def test_content_search_hit() -> None:
 def test_chunk_metadata() -> None:
     c = ChunkMetadata(doc_id="1", chunk_index=0, start_line=1, end_line=80, text="content")
     assert c.chunk_index == 0
+
+
+def test_document_format_toc_cached_until_readded(tmp_path: Path) -> None:
+    doc = Document(
+        id="1",
+        name="t.md",
+        path_to_raw="/a",
+        path_to_md="/b",
+        num_lines=50,
+        table_of_contents=[TOCEntry(title="Top", level=1, start_line=1, end_line=20)],
+    )
+    copy = doc.model_copy(deep=True)
+    store = DocumentStore(StorageManager(tmp_path / "storage"))
+    store.add(doc)
+    first = store.formatted_toc("1")
+    assert store.formatted_toc("1") is first
+    # The cache lives in the store, so formatting doesn't affect model equality
+    assert doc.format_toc() == first
+    assert doc == copy
+
+    doc.table_of_contents.append(TOCEntry(title="Next", level=1, start_line=21, end_line=50))
+    store.add(doc)
+    assert "Next" in store.formatted_toc("1")
+
+
+def test_document_store_serialisation_matches_model_dump() -> None:
+    from athenaeum.document_store import _doc_to_dict
+
+    doc = Document(
+        id="1",
+        name="t.md",
+        path_to_raw="/a",
+        path_to_md="/b",
+        num_lines=50,
+        table_of_contents=[
+            TOCEntry(title="Top", level=1, start_line=1, end_line=20),
+            TOCEntry(title="Tail", level=2, start_line=21),
+        ],
+        created_at=datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=UTC),
+        file_size=123,
+        file_type=".md",
+        tags={"a", "b"},
+    )
+    assert _doc_to_dict(doc) == doc.model_dump(mode="json")
+    assert Document.model_validate(_doc_to_dict(doc)) == doc
+
+
+def test_document_store_add_many_saves_once(tmp_path: Path) -> None:
+    storage = StorageManager(tmp_path / "storage")
+    store = DocumentStore(storage)
+    saves = 0
+    original = storage.save_metadata
+
+    def counting(data: dict[str, object]) -> None:
+        nonlocal saves
+        saves += 1
+        original(data)
+
+    storage.save_metadata = counting  # type: ignore[method-assign]
+    docs = [
+        Document(
+            id=str(i),
+            name=f"{i}.md",
+            path_to_raw="/a",
+            path_to_md="/b",
+            num_lines=1,
+            created_at=datetime(2024, 1, i + 1, tzinfo=UTC),
+            tags={"t"},
+        )
+        for i in range(3)
+    ]
+    store.add_many(docs)
+    assert saves == 1
+    reloaded = DocumentStore(StorageManager(tmp_path / "storage"))
+    assert [d.id for d in reloaded.list_by_tags({"t"})] == ["0", "1", "2"]
+
+
+def test_document_store_list_by_tags_ties_keep_registry_order(tmp_path: Path) -> None:
+    store = DocumentStore(StorageManager(tmp_path / "storage"))
+    created = datetime(2024, 1, 1, tzinfo=UTC)
+    ids = [f"doc-{i:02d}" for i in reversed(range(20))]
+    store.add_many(
+        [
+            Document(
+                id=doc_id,
+                name=f"{doc_id}.md",
+                path_to_raw="/a",
+                path_to_md="/b",
+                num_lines=1,
+                created_at=created,
+                tags={"t"},
+            )
+            for doc_id in ids
+        ]
+    )
+    assert [d.id for d in store.list_by_tags({"t"})] == ids
+    reloaded = DocumentStore(StorageManager(tmp_path / "storage"))
+    assert [d.id for d in reloaded.list_by_tags({"t"})] == ids
+
+
+def test_document_store_validates_lazily(tmp_path: Path) -> None:
+    store = DocumentStore(StorageManager(tmp_path / "storage"))
+    store.add_many(
+        [
+            Document(
+                id=str(i),
+                name=f"Doc{i}.md",
+                path_to_raw="/a",
+                path_to_md="/b",
+                num_lines=1,
+                tags={f"t{i}"},
+            )
+            for i in range(3)
+        ]
+    )
+    reloaded = DocumentStore(StorageManager(tmp_path / "storage"))
+    assert all(isinstance(d, dict) for d in reloaded._docs.values())
+    assert reloaded.list_ids() == ["0", "1", "2"]
+    assert reloaded.ids_by_tags({"t1"}) == {"1"}
+    assert reloaded.lowercase_names()[1].tolist() == ["doc0.md", "doc1.md", "doc2.md"]
+    assert reloaded.get("1") == store.get("1")
+    assert isinstance(reloaded._docs["1"], Document)
+    assert isinstance(reloaded._docs["0"], dict)
+    reloaded.remove("2")
+    again = DocumentStore(StorageManager(tmp_path / "storage"))
+    assert again.list_all() == [store.get("0"), store.get("1")]
@@ -1,33 +1,39 @@
 """Tests for OCR providers."""
 
+import sys
+import types
 from pathlib import Path
+from typing import Any
 
 import pytest
 
 from athenaeum.ocr import get_ocr_provider
 from athenaeum.ocr.base import OCRProvider
 from athenaeum.ocr.custom import CustomOCR
+from athenaeum.ocr.lighton import LightOnOCR
 from athenaeum.ocr.markitdown import MarkitdownOCR
 
 
-def test_markitdown_supported_extensions() -> None:
-    m = MarkitdownOCR()
-    exts = m.supported_extensions()
+@pytest.fixture(scope="module")
+def markitdown() -> MarkitdownOCR:
+    return MarkitdownOCR()
+
+
+def test_markitdown_supported_extensions(markitdown: MarkitdownOCR) -> None:
+    exts = markitdown.supported_extensions()
     assert ".pdf" in exts
     assert ".md" in exts
     assert ".docx" in exts
 
 
-def test_markitdown_convert_md(sample_md_path: Path) -> None:
-    m = MarkitdownOCR()
-    result = m.convert(sample_md_path)
+def test_markitdown_convert_md(markitdown: MarkitdownOCR, sample_md_path: Path) -> None:
+    result = markitdown.convert(sample_md_path)
     assert "Introduction" in result
     assert len(result) > 0
 
 
-def test_markitdown_convert_txt(sample_txt_path: Path) -> None:
-    m = MarkitdownOCR()
-    result = m.convert(sample_txt_path)
+def test_markitdown_convert_txt(markitdown: MarkitdownOCR, sample_txt_path: Path) -> None:
+    result = markitdown.convert(sample_txt_path)
     assert "plain text" in result
 
 
@@ -59,3 +65,87 @@ def test_factory_unknown() -> None:
 def test_ocr_provider_is_abc() -> None:
     with pytest.raises(TypeError):
         OCRProvider()  # type: ignore[abstract]
+
+
+class _FakePage:
+    def __init__(self, index: int, log: dict[str, list[Any]]) -> None:
+        self._index = index
+        self._log = log
+
+    def render(self, scale: float) -> Any:
+        self._log["rendered"].append(self._index)
+        return types.SimpleNamespace(to_pil=lambda: f"page{self._index}")
+
+    def close(self) -> None:
+        self._log["closed_pages"].append(self._index)
+
+
+def _lighton_with_stubs(
+    monkeypatch: pytest.MonkeyPatch, n_pages: int
+) -> tuple[LightOnOCR, dict[str, list[Any]]]:
+    log: dict[str, list[Any]] = {
+        "rendered": [],
+        "closed_pages": [],
+        "closed_docs": [],
+        "batches": [],
+    }
+
+    class FakePdfDocument:
+        def __init__(self, path: Path) -> None:
+            pass
+
+        def __len__(self) -> int:
+            return n_pages
+
+        def __getitem__(self, index: int) -> _FakePage:
+            return _FakePage(index, log)
+
+        def close(self) -> None:
+            log["closed_docs"].append(True)
+
+    def fake_pipe(images: list[Any], batch_size: int) -> list[list[dict[str, Any]]]:
+        # Record the batch together with how many pages had been rendered by then
+        log["batches"].append((list(images), len(log["rendered"])))
+        return [[{"generated_text": f"text:{image}"}] for image in images]
+
+    class FakeImageFile:
+        def __enter__(self) -> "FakeImageFile":
+            return self
+
+        def __exit__(self, *exc: object) -> None:
+            pass
+
+        def convert(self, mode: str) -> str:
+            return f"image-{mode}"
+
+    pil_image = types.ModuleType("PIL.Image")
+    pil_image.open = lambda path: FakeImageFile()  # type: ignore[attr-defined]
+    pil = types.ModuleType("PIL")
+    pil.Image = pil_image  # type: ignore[attr-defined]
+    transformers = types.ModuleType("transformers")
+    transformers.pipeline = lambda *args, **kwargs: fake_pipe  # type: ignore[attr-defined]
+    pypdfium2 = types.ModuleType("pypdfium2")
+    pypdfium2.PdfDocument = FakePdfDocument  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "PIL", pil)
+    monkeypatch.setitem(sys.modules, "PIL.Image", pil_image)
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+    monkeypatch.setitem(sys.modules, "pypdfium2", pypdfium2)
+    return LightOnOCR(), log
+
+
+def test_lighton_pdf_renders_pages_per_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    ocr, log = _lighton_with_stubs(monkeypatch, n_pages=10)
+    result = ocr.convert(Path("doc.pdf"))
+    assert result == "\n\n".join(f"text:page{i}" for i in range(10))
+    assert [len(images) for images, _ in log["batches"]] == [4, 4, 2]
+    # Each batch is rendered just before it is sent through the model
+    assert [rendered for _, rendered in log["batches"]] == [4, 8, 10]
+    assert log["closed_pages"] == list(range(10))
+    assert log["closed_docs"] == [True]
+
+
+def test_lighton_image_is_a_single_page(monkeypatch: pytest.MonkeyPatch) -> None:
+    ocr, log = _lighton_with_stubs(monkeypatch, n_pages=0)
+    assert ocr.convert(Path("scan.png")) == "text:image-RGB"
+    assert log["batches"] == [(["image-RGB"], 0)]
+    assert log["closed_docs"] == []
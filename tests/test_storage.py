@@ -1,59 +1,107 @@
 """Tests for StorageManager."""
 
+import errno
+import os
+import shutil
+import uuid
+from collections.abc import Iterator
 from pathlib import Path
 
+import pytest
+
 from athenaeum.storage import StorageManager
 
+_SHM = Path("/dev/shm")
 
-def test_storage_creates_root(tmp_path: Path) -> None:
-    root = tmp_path / "storage"
-    sm = StorageManager(root)
-    assert root.exists()
-    assert sm.root == root
 
+@pytest.fixture
+def storage_root(tmp_path: Path) -> Iterator[Path]:
+    """A not-yet-created storage root, on tmpfs (``/dev/shm``) when available."""
+    if _SHM.is_dir() and os.access(_SHM, os.W_OK):
+        root = _SHM / f"athenaeum-test-{uuid.uuid4().hex}"
+    else:
+        root = tmp_path / "storage"
+    yield root
+    shutil.rmtree(root, ignore_errors=True)
 
-def test_doc_dir(tmp_path: Path) -> None:
-    sm = StorageManager(tmp_path / "storage")
+
+def test_storage_creates_root(storage_root: Path) -> None:
+    sm = StorageManager(storage_root)
+    assert storage_root.exists()
+    assert sm.root == storage_root
+
+
+def test_doc_dir(storage_root: Path) -> None:
+    sm = StorageManager(storage_root)
     d = sm.doc_dir("abc")
     assert d.exists()
     assert d.name == "abc"
 
 
-def test_raw_and_content_paths(tmp_path: Path) -> None:
-    sm = StorageManager(tmp_path / "storage")
+def test_raw_and_content_paths(storage_root: Path) -> None:
+    sm = StorageManager(storage_root)
     raw = sm.raw_path("doc1", ".pdf")
     assert raw.name == "raw.pdf"
     md = sm.content_md_path("doc1")
     assert md.name == "content.md"
 
 
-def test_remove_doc(tmp_path: Path) -> None:
-    sm = StorageManager(tmp_path / "storage")
+def test_remove_doc(storage_root: Path) -> None:
+    sm = StorageManager(storage_root)
     sm.doc_dir("doc1")
     sm.raw_path("doc1", ".txt").write_text("test")
     sm.remove_doc("doc1")
     assert not (sm.docs_dir / "doc1").exists()
 
 
-def test_remove_doc_nonexistent(tmp_path: Path) -> None:
-    sm = StorageManager(tmp_path / "storage")
+def test_remove_doc_nonexistent(storage_root: Path) -> None:
+    sm = StorageManager(storage_root)
     sm.remove_doc("nonexistent")  # should not raise
 
 
-def test_chroma_dir(tmp_path: Path) -> None:
-    sm = StorageManager(tmp_path / "storage")
+def test_chroma_dir(storage_root: Path) -> None:
+    sm = StorageManager(storage_root)
     cd = sm.ensure_chroma_dir()
     assert cd.exists()
 
 
-def test_metadata_roundtrip(tmp_path: Path) -> None:
-    sm = StorageManager(tmp_path / "storage")
+def test_metadata_roundtrip(storage_root: Path) -> None:
+    sm = StorageManager(storage_root)
     data = {"docs": {"doc1": {"name": "test.pdf"}}}
     sm.save_metadata(data)
     loaded = sm.load_metadata()
     assert loaded == data
 
 
-def test_metadata_empty(tmp_path: Path) -> None:
-    sm = StorageManager(tmp_path / "storage")
+def test_metadata_empty(storage_root: Path) -> None:
+    sm = StorageManager(storage_root)
     assert sm.load_metadata() == {}
+
+
+def test_bm25_dir(storage_root: Path) -> None:
+    sm = StorageManager(storage_root)
+    assert sm.bm25_dir == sm.root / "index" / "bm25"
+
+
+def test_store_raw_copies_data_and_mtime(tmp_path: Path) -> None:
+    src = tmp_path / "Report.PDF"
+    src.write_bytes(b"%PDF-1.4\n" + bytes(range(256)) * 1000)
+    os.utime(src, (1_000_000_000, 1_000_000_000))
+    sm = StorageManager(tmp_path / "storage")
+    dest = sm.store_raw("doc1", src, ".pdf")
+    assert dest == sm.raw_path("doc1", ".pdf")
+    assert dest.read_bytes() == src.read_bytes()
+    assert dest.stat().st_mtime == src.stat().st_mtime
+
+
+def test_store_raw_falls_back_without_copy_file_range(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def unsupported(*args: object) -> int:
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+    src = tmp_path / "notes.txt"
+    src.write_text("hello")
+    dest = StorageManager(tmp_path / "storage").store_raw("doc1", src, ".txt")
+    assert dest.read_text() == "hello"
@@ -1,11 +1,11 @@
 """Tests for TOC extraction."""
 
+from athenaeum.models import TOCEntry
 from athenaeum.toc import extract_toc
 
 
-def test_extract_toc_basic(sample_md_text: str) -> None:
-    entries = extract_toc(sample_md_text)
-    titles = [e.title for e in entries]
+def test_extract_toc_basic(parsed_toc: list[TOCEntry]) -> None:
+    titles = [e.title for e in parsed_toc]
     assert "Introduction" in titles
     assert "Getting Started" in titles
     assert "Features" in titles
@@ -14,30 +14,62 @@ def test_extract_toc_basic(sample_md_text: str) -> None:
     assert "Conclusion" in titles
 
 
-def test_extract_toc_levels(sample_md_text: str) -> None:
-    entries = extract_toc(sample_md_text)
-    by_title = {e.title: e for e in entries}
+def test_extract_toc_levels(parsed_toc: list[TOCEntry]) -> None:
+    by_title = {e.title: e for e in parsed_toc}
     assert by_title["Introduction"].level == 1
     assert by_title["Getting Started"].level == 2
     assert by_title["Search"].level == 3
 
 
-def test_extract_toc_line_ranges(sample_md_text: str) -> None:
-    entries = extract_toc(sample_md_text)
-    for entry in entries:
+def test_extract_toc_line_ranges(parsed_toc: list[TOCEntry]) -> None:
+    for entry in parsed_toc:
         assert entry.start_line >= 1
         assert entry.end_line is not None
         assert entry.end_line >= entry.start_line
 
 
-def test_extract_toc_h1_spans_to_end(sample_md_text: str) -> None:
-    entries = extract_toc(sample_md_text)
-    h1 = [e for e in entries if e.level == 1]
+def test_extract_toc_h1_spans_to_end(parsed_toc: list[TOCEntry], sample_md_text: str) -> None:
+    h1 = [e for e in parsed_toc if e.level == 1]
     assert len(h1) == 1
-    total_lines = len(sample_md_text.split("\n"))
+    total_lines = sample_md_text.count("\n") + 1
     assert h1[0].end_line == total_lines
 
 
 def test_extract_toc_empty() -> None:
     assert extract_toc("") == []
     assert extract_toc("No headings here\nJust text") == []
+    assert extract_toc("#hashtag and C# but no heading") == []
+
+
+def test_extract_toc_flat_headings() -> None:
+    entries = extract_toc("## A\ntext\n## B\n\n## C\nend\n")
+    assert [(e.start_line, e.end_line) for e in entries] == [(1, 2), (3, 4), (5, 7)]
+
+
+def test_extract_toc_heading_syntax() -> None:
+    text = "# One\n####### Seven\n#NoSpace\n  ## Indented  \n#\n###\tTabbed\ntext # not heading"
+    entries = extract_toc(text)
+    assert [(e.title, e.level, e.start_line) for e in entries] == [
+        ("One", 1, 1),
+        ("Indented", 2, 4),
+        ("Tabbed", 3, 6),
+    ]
+
+
+def test_extract_toc_end_lines_nested() -> None:
+    text = "# A\n## B\n### C\n## D\ntext\n# E\n### F\nend"
+    entries = extract_toc(text)
+    assert [(e.title, e.end_line) for e in entries] == [
+        ("A", 5),
+        ("B", 3),
+        ("C", 3),
+        ("D", 5),
+        ("E", 8),
+        ("F", 8),
+    ]
+
+
+def test_extract_toc_crlf_matches_lf(sample_md_text: str) -> None:
+    crlf = extract_toc(sample_md_text.replace("\n", "\r\n"))
+    assert crlf == extract_toc(sample_md_text)
+    assert all(not e.title.endswith("\r") for e in crlf)
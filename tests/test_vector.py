@@ -3,37 +3,28 @@
 from __future__ import annotations
 
 import uuid
+from collections.abc import Iterator
 
-from langchain_core.embeddings import Embeddings
+import pytest
 
 from athenaeum.models import ChunkMetadata
 from athenaeum.search.vector import VectorIndex
+from tests.conftest import FakeEmbeddings
 
 
-class FakeEmbeddings(Embeddings):
-    """Deterministic fake embeddings for testing."""
+@pytest.fixture(scope="module")
+def shared_vector_index(fake_embeddings: FakeEmbeddings) -> VectorIndex:
+    return VectorIndex(embeddings=fake_embeddings, collection_name=f"test-{uuid.uuid4().hex}")
 
-    def embed_documents(self, texts: list[str]) -> list[list[float]]:
-        return [self._embed(t) for t in texts]
 
-    def embed_query(self, text: str) -> list[float]:
-        return self._embed(text)
-
-    @staticmethod
-    def _embed(text: str) -> list[float]:
-        # Simple hash-based embedding to 32 dims
-        vec = [0.0] * 32
-        for i, ch in enumerate(text.encode()):
-            vec[i % 32] += ch / 256.0
-        # Normalize
-        norm = sum(x * x for x in vec) ** 0.5
-        if norm > 0:
-            vec = [x / norm for x in vec]
-        return vec
-
-
-def _make_index() -> VectorIndex:
-    return VectorIndex(embeddings=FakeEmbeddings(), collection_name=f"test-{uuid.uuid4().hex}")
+@pytest.fixture
+def vector_index(shared_vector_index: VectorIndex) -> Iterator[VectorIndex]:
+    """The module's shared index, emptied after each test."""
+    yield shared_vector_index
+    collection = shared_vector_index._store._collection
+    ids = collection.get(include=[])["ids"]
+    if ids:
+        collection.delete(ids=ids)
 
 
 def _make_chunks() -> list[ChunkMetadata]:
@@ -53,60 +44,124 @@ def _make_chunks() -> list[ChunkMetadata]:
     ]
 
 
-def test_vector_add_and_search() -> None:
-    idx = _make_index()
-    idx.add_chunks(_make_chunks())
-    results = idx.search("python programming", top_k=3)
+def test_vector_add_and_search(vector_index: VectorIndex) -> None:
+    vector_index.add_chunks(_make_chunks())
+    results = vector_index.search("python programming", top_k=3)
     assert len(results) > 0
     assert all(isinstance(c, ChunkMetadata) for c, _ in results)
 
 
-def test_vector_search_empty() -> None:
-    idx = _make_index()
-    results = idx.search("anything")
+def test_vector_search_empty(vector_index: VectorIndex) -> None:
+    results = vector_index.search("anything")
     assert results == []
 
 
-def test_vector_filter_by_doc_id() -> None:
-    idx = _make_index()
-    idx.add_chunks(_make_chunks())
-    results = idx.search("python", doc_id="d2")
+def test_vector_filter_by_doc_id(vector_index: VectorIndex) -> None:
+    vector_index.add_chunks(_make_chunks())
+    results = vector_index.search("python", doc_id="d2")
     assert all(c.doc_id == "d2" for c, _ in results)
 
 
-def test_vector_remove_document() -> None:
-    idx = _make_index()
-    idx.add_chunks(_make_chunks())
-    idx.remove_document("d1")
-    results = idx.search("python", top_k=10)
+def test_vector_remove_document(vector_index: VectorIndex) -> None:
+    vector_index.add_chunks(_make_chunks())
+    vector_index.remove_document("d1")
+    results = vector_index.search("python", top_k=10)
     assert all(c.doc_id == "d2" for c, _ in results)
 
 
-def test_vector_add_empty() -> None:
-    idx = _make_index()
-    idx.add_chunks([])  # should not raise
+def test_vector_remove_documents(vector_index: VectorIndex) -> None:
+    vector_index.add_chunks(_make_chunks())
+    vector_index.remove_documents([])
+    assert len(vector_index.search("python", top_k=10)) == 3
+    vector_index.remove_documents({"d1", "d2", "missing"})
+    assert vector_index.search("python", top_k=10) == []
+
 
+def test_vector_add_empty(vector_index: VectorIndex) -> None:
+    vector_index.add_chunks([])  # should not raise
 
-def test_vector_scores_in_range() -> None:
-    idx = _make_index()
-    idx.add_chunks(_make_chunks())
-    results = idx.search("python programming", top_k=10)
+
+def test_vector_scores_in_range(vector_index: VectorIndex) -> None:
+    vector_index.add_chunks(_make_chunks())
+    results = vector_index.search("python programming", top_k=10)
     assert len(results) > 0
     for _, score in results:
         assert 0.0 <= score <= 1.0, f"Score {score} out of [0, 1]"
 
 
-def test_vector_threshold_excludes_below() -> None:
-    idx = _make_index()
-    idx.add_chunks(_make_chunks())
+def test_vector_threshold_excludes_below(vector_index: VectorIndex) -> None:
+    vector_index.add_chunks(_make_chunks())
     # threshold=1.0 means only perfect matches pass; nothing should match exactly
-    results = idx.search("python programming", top_k=10, similarity_threshold=1.0)
+    results = vector_index.search("python programming", top_k=10, similarity_threshold=1.0)
     assert results == []
 
 
-def test_vector_threshold_none_returns_all() -> None:
-    idx = _make_index()
-    idx.add_chunks(_make_chunks())
-    without_threshold = idx.search("python programming", top_k=10)
-    with_none = idx.search("python programming", top_k=10, similarity_threshold=None)
+def test_vector_threshold_none_returns_all(vector_index: VectorIndex) -> None:
+    vector_index.add_chunks(_make_chunks())
+    without_threshold = vector_index.search("python programming", top_k=10)
+    with_none = vector_index.search("python programming", top_k=10, similarity_threshold=None)
     assert len(with_none) == len(without_threshold)
+
+
+def test_vector_add_chunks_batches_embeddings() -> None:
+    class CountingEmbeddings(FakeEmbeddings):
+        def __init__(self) -> None:
+            self.batch_sizes: list[int] = []
+
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            self.batch_sizes.append(len(texts))
+            return super().embed_documents(texts)
+
+    embeddings = CountingEmbeddings()
+    idx = VectorIndex(embeddings=embeddings, collection_name=f"test-{uuid.uuid4().hex}")
+    chunks = [
+        ChunkMetadata(doc_id="d1", chunk_index=i, start_line=i, end_line=i, text=f"chunk {i}")
+        for i in range(300)
+    ]
+    idx.add_chunks(chunks)
+    assert embeddings.batch_sizes == [256, 44]
+    assert idx._store._collection.count() == 300
+
+
+def test_vector_add_chunks_concurrent_batches() -> None:
+    import threading
+
+    class SlowEmbeddings(FakeEmbeddings):
+        def __init__(self) -> None:
+            self.threads: set[int] = set()
+            self.barrier = threading.Barrier(2, timeout=5)
+
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            self.threads.add(threading.get_ident())
+            self.barrier.wait()  # only passes if two batches are in flight at once
+            return super().embed_documents(texts)
+
+    embeddings = SlowEmbeddings()
+    idx = VectorIndex(
+        embeddings=embeddings,
+        collection_name=f"test-{uuid.uuid4().hex}",
+        batch_size=5,
+        max_concurrency=2,
+    )
+    chunks = [
+        ChunkMetadata(doc_id="d1", chunk_index=i, start_line=i, end_line=i, text=f"chunk {i}")
+        for i in range(20)
+    ]
+    idx.add_chunks(chunks)
+    assert len(embeddings.threads) == 2
+    assert idx._store._collection.count() == 20
+
+
+def test_vector_chunk_metadata_matches_model_dump() -> None:
+    from athenaeum.search.vector import _chunk_to_metadata
+
+    chunk = _make_chunks()[0]
+    assert _chunk_to_metadata(chunk) == chunk.model_dump(exclude={"text"}, exclude_none=True)
+    chunk = chunk.model_copy(update={"start_char": 5, "end_char": 40})
+    assert _chunk_to_metadata(chunk) == chunk.model_dump(exclude={"text"})
+
+
+def test_vector_search_returns_offsets_and_text(vector_index: VectorIndex) -> None:
+    chunk = _make_chunks()[0].model_copy(update={"start_char": 5, "end_char": 40})
+    vector_index.add_chunks([chunk])
+    assert vector_index.search(chunk.text, top_k=1)[0][0] == chunk